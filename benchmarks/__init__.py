@@ -0,0 +1,8 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Benchmarks for testdoc.
+
+Run them with::
+
+  $ python -m benchmarks.run --help
+"""
@@ -0,0 +1,111 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Generate synthetic test suites to benchmark testdoc against."""
+
+import os
+
+
+class CorpusSpec(object):
+    """The shape of a generated test suite.
+
+    @ivar modules: The number of test modules.
+    @ivar classes: The number of concrete test classes in each module.
+    @ivar tests: The number of tests in each class.
+    @ivar doc_lines: The number of lines in each docstring.
+    @ivar comment_lines: The number of lines in each comment.
+    @ivar depth: The number of base classes, each inheriting from the last,
+        between C{unittest.TestCase} and the concrete classes. Each base
+        class has C{tests} tests of its own.
+    """
+
+    def __init__(self, modules=20, classes=5, tests=20, doc_lines=3,
+                 comment_lines=2, depth=0, package='benchcorpus'):
+        self.modules = modules
+        self.classes = classes
+        self.tests = tests
+        self.doc_lines = doc_lines
+        self.comment_lines = comment_lines
+        self.depth = depth
+        self.package = package
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    @property
+    def module_names(self):
+        return ['%s.test_module%d' % (self.package, i)
+                for i in range(self.modules)]
+
+
+def _docstring(lines, indent, subject):
+    if lines == 0:
+        return []
+    text = ['%s"""%s should behave.' % (indent, subject)]
+    for i in range(1, lines):
+        text.append('%sLine %d of the description of %s.' % (
+            indent, i, subject))
+    text[-1] += '"""'
+    return text
+
+
+def _comment(lines, indent, subject):
+    return ['%s# Comment line %d about %s.' % (indent, i, subject)
+            for i in range(lines)]
+
+
+def _test(spec, name, index):
+    """Write a test method, documented in one of four ways: a docstring, a
+    preceding comment, an internal comment or not at all.
+    """
+    style = index % 4
+    lines = ['']
+    if style == 1:
+        lines.extend(_comment(spec.comment_lines, '    ', name))
+    lines.append('    def %s(self):' % (name,))
+    if style == 0:
+        lines.extend(_docstring(spec.doc_lines, '        ', name))
+    elif style == 2:
+        lines.extend(_comment(spec.comment_lines, '        ', name))
+    lines.append('        pass')
+    return lines
+
+
+def _class(spec, name, base, prefix):
+    lines = ['', '']
+    lines.append('class %s(%s):' % (name, base))
+    lines.extend(_docstring(spec.doc_lines, '    ', name))
+    for i in range(spec.tests):
+        test = 'test_%sthing%dBehavesCorrectly' % (prefix, i)
+        lines.extend(_test(spec, test, i))
+    return lines
+
+
+def module_source(spec, index):
+    """Return the source of the C{index}th module of C{spec}."""
+    lines = ['"""Generated test module %d."""' % (index,), '',
+             'import unittest']
+    base = 'unittest.TestCase'
+    for depth in range(spec.depth):
+        name = 'BaseTest%d' % (depth,)
+        lines.extend(_class(spec, name, base, 'base%d_' % (depth,)))
+        base = name
+    for i in range(spec.classes):
+        lines.extend(_class(spec, 'TestHTTPThing%d' % (i,), base, ''))
+    return '\n'.join(lines) + '\n'
+
+
+def write_corpus(spec, directory):
+    """Write the package described by C{spec} into C{directory}.
+
+    @return: The directory of the package.
+    """
+    package = os.path.join(directory, spec.package)
+    os.makedirs(package)
+    open(os.path.join(package, '__init__.py'), 'w').close()
+    for i in range(spec.modules):
+        stream = open(os.path.join(package, 'test_module%d.py' % (i,)), 'w')
+        try:
+            stream.write(module_source(spec, i))
+        finally:
+            stream.close()
+    return package
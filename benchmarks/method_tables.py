@@ -0,0 +1,60 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Compare looking up test methods name by name with the cached method
+tables, on a wide and deep hierarchy of test classes.
+
+Usage: python -m benchmarks.method_tables [WIDTH DEPTH TESTS]
+"""
+
+import sys
+import time
+import types
+import unittest
+
+from testdoc import reflect
+
+
+def make_hierarchy(width, depth, tests):
+    """Make C{width} concrete test classes, each at the bottom of a chain of
+    C{depth} shared base classes with C{tests} tests apiece.
+    """
+    def test(self):
+        pass
+    base = unittest.TestCase
+    for level in range(depth):
+        namespace = dict(
+            ('test_level%d_%d' % (level, i), test) for i in range(tests))
+        base = type('Base%d' % (level,), (base,), namespace)
+    return [type('Concrete%d' % (i,), (base,), {'test_own': test})
+            for i in range(width)]
+
+
+def by_name(classes):
+    for klass in classes:
+        [getattr(klass, 'test%s' % name)
+         for name in reflect.getTestCaseNames(klass)]
+
+
+def by_table(classes):
+    for klass in classes:
+        [types.MethodType(function, None, klass)
+         for function in reflect.getTestMethods(klass)]
+
+
+def timed(function, classes):
+    start = time.time()
+    function(classes)
+    return time.time() - start
+
+
+def main(width=300, depth=10, tests=30):
+    print '%d classes, %d bases deep, %d tests per base' % (
+        width, depth, tests)
+    print 'by name:  %.3fs' % (timed(by_name, make_hierarchy(
+        width, depth, tests)),)
+    print 'by table: %.3fs' % (timed(by_table, make_hierarchy(
+        width, depth, tests)),)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,256 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Time each stage of documenting a generated test suite.
+
+Each stage is run several times and the fastest time is kept. The results
+are written as JSON, so that runs against different revisions can be
+compared with --compare.
+
+The peak resident set size of the process is recorded after each stage.
+It never goes down, so a stage's figure includes everything before it.
+"""
+
+import compileall
+import cStringIO
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from optparse import OptionParser
+
+import testdoc
+from testdoc import (
+    bytecode, documenter, finder, formatter, reflect, source, static)
+from testdoc import tree
+
+from benchmarks.corpus import CorpusSpec, write_corpus
+
+
+class NullFinder(object):
+    """A finder that ignores everything it is given."""
+
+    def got_module(self, module):
+        pass
+
+    got_test_class = got_test = got_module
+
+
+class ObjectCollector(object):
+    """A finder that keeps everything it is given."""
+
+    def __init__(self):
+        self.objects = []
+        self.class_names = []
+        self.test_names = []
+        self.test_ids = []
+
+    def got_module(self, module):
+        self.objects.append(module)
+
+    def got_test_class(self, klass):
+        self.objects.append(klass)
+        self.class_names.append(klass.__name__)
+
+    def got_test(self, method):
+        self.objects.append(method)
+        self.test_names.append(method.__name__)
+        self.test_ids.append('%s.%s.%s' % (
+            method.im_class.__module__, method.im_class.__name__,
+            method.__name__))
+
+
+def forget_modules(spec):
+    for name in spec.module_names:
+        sys.modules.pop(name, None)
+    source.clear_indexes()
+
+
+def time_stage(function, repeat, setup=None):
+    """Return the fastest of C{repeat} runs of C{function}."""
+    best = None
+    for i in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.time()
+        function()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def peak_rss_kb():
+    """Return the peak resident set size of this process, in kilobytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # Reported in bytes rather than kilobytes.
+        peak //= 1024
+    return peak
+
+
+def run(spec, repeat):
+    """Benchmark each stage of documenting the suite described by C{spec}.
+
+    @return: A dict mapping stage names to dicts of results.
+    """
+    modules = [reflect.namedAny(name) for name in spec.module_names]
+    collector = ObjectCollector()
+    for module in modules:
+        finder.find_tests(collector, module)
+    builder = tree.TreeBuilder(locations=True)
+    doc = documenter.Documenter(builder)
+    for module in modules:
+        finder.find_tests(doc, module)
+    document = builder.document
+    doc = documenter.Documenter(NullFinder())
+
+    def import_modules():
+        for name in spec.module_names:
+            reflect.namedAny(name)
+
+    def resolve_test_ids():
+        reflect.resolve_many(collector.test_ids)
+
+    def find_tests():
+        for module in modules:
+            finder.find_tests(NullFinder(), module)
+
+    def extract_docs():
+        for obj in collector.objects:
+            reflect.extract_docs(obj)
+
+    def static_find_tests():
+        static_finder = static.StaticFinder()
+        for name in spec.module_names:
+            static_finder.find_tests(NullFinder(), name)
+
+    def bytecode_find_tests():
+        bytecode_finder = bytecode.BytecodeFinder()
+        for name in spec.module_names:
+            bytecode_finder.find_tests(NullFinder(), name)
+
+    def humanise():
+        for name in collector.class_names:
+            doc.format_test_class(name)
+        for name in collector.test_names:
+            doc.format_test(name)
+
+    stages = [
+        ('import', import_modules, lambda: forget_modules(spec),
+         len(modules)),
+        ('resolve_test_ids', resolve_test_ids, None,
+         len(collector.test_ids)),
+        ('find_tests', find_tests, source.clear_indexes, len(modules)),
+        ('extract_docs', extract_docs, source.clear_indexes,
+         len(collector.objects)),
+        ('static_find_tests', static_find_tests, None, len(modules)),
+        ('bytecode_find_tests', bytecode_find_tests, None, len(modules)),
+        ('humanise', humanise, None,
+         len(collector.class_names) + len(collector.test_names)),
+        ]
+    for name in sorted(FORMATS):
+        render = lambda name=name: tree.render(
+            document, FORMATS[name](cStringIO.StringIO()))
+        stages.append(('format_' + name, render, None,
+                       len(collector.objects)))
+    results = {}
+    for name, function, setup, count in stages:
+        results[name] = {
+            'seconds': time_stage(function, repeat, setup),
+            'count': count,
+            'peak_rss_kb': peak_rss_kb(),
+            }
+    return results
+
+
+FORMATS = {
+    'jsonl': formatter.JSONLinesFormatter,
+    'moin': formatter.WikiFormatter,
+    'rest': formatter.ReSTFormatter,
+    'shiny': formatter.ShinyFormatter,
+    }
+
+
+def compare(old, new, stream):
+    """Write a table comparing the stage times in C{old} and C{new}."""
+    stream.write('%-20s %10s %10s %8s\n' % ('stage', 'old', 'new', 'ratio'))
+    for name in sorted(new['stages']):
+        after = new['stages'][name]['seconds']
+        before = old['stages'].get(name, {}).get('seconds')
+        if before:
+            stream.write('%-20s %9.4fs %9.4fs %7.2fx\n' % (
+                name, before, after, after / before))
+        else:
+            stream.write('%-20s %10s %9.4fs\n' % (name, '-', after))
+    if 'peak_rss_kb' in old:
+        stream.write('%-20s %9dK %9dK %7.2fx\n' % (
+            'peak_rss', old['peak_rss_kb'], new['peak_rss_kb'],
+            float(new['peak_rss_kb']) / old['peak_rss_kb']))
+
+
+def make_options():
+    parser = OptionParser(usage="usage: python -m benchmarks.run [options]")
+    defaults = CorpusSpec()
+    parser.add_option("--modules", type="int", default=defaults.modules)
+    parser.add_option("--classes", type="int", default=defaults.classes,
+        help="Concrete test classes per module.")
+    parser.add_option("--tests", type="int", default=defaults.tests,
+        help="Tests per class.")
+    parser.add_option("--doc-lines", type="int",
+        default=defaults.doc_lines, help="Lines in each docstring.")
+    parser.add_option("--comment-lines", type="int",
+        default=defaults.comment_lines, help="Lines in each comment.")
+    parser.add_option("--depth", type="int", default=defaults.depth,
+        help="Depth of the base classes of each test class.")
+    parser.add_option("--repeat", type="int", default=3,
+        help="Run each stage this many times and keep the fastest.")
+    parser.add_option("-o", "--output", metavar="FILE",
+        help="Write the results as JSON to FILE rather than standard "
+        "output.")
+    parser.add_option("--compare", metavar="FILE",
+        help="Compare the results with those in FILE, from an earlier run.")
+    return parser
+
+
+def main(argv=None):
+    parser = make_options()
+    options, args = parser.parse_args(argv)
+    spec = CorpusSpec(
+        options.modules, options.classes, options.tests, options.doc_lines,
+        options.comment_lines, options.depth)
+    directory = tempfile.mkdtemp()
+    sys.path.insert(0, directory)
+    try:
+        write_corpus(spec, directory)
+        # For bytecode_find_tests, even if Python isn't writing them.
+        compileall.compile_dir(directory, quiet=True)
+        stages = run(spec, options.repeat)
+    finally:
+        sys.path.remove(directory)
+        forget_modules(spec)
+        shutil.rmtree(directory)
+    results = {
+        'testdoc_version': testdoc.__version__,
+        'python': platform.python_version(),
+        'corpus': spec.as_dict(),
+        'stages': stages,
+        'peak_rss_kb': peak_rss_kb(),
+        }
+    if options.output:
+        stream = open(options.output, 'w')
+    else:
+        stream = sys.stdout
+    json.dump(results, stream, indent=2, sort_keys=True)
+    stream.write('\n')
+    if stream is not sys.stdout:
+        stream.close()
+    if options.compare:
+        compare(json.load(open(options.compare)), results, sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
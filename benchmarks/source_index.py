@@ -0,0 +1,95 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Compare finding tests through inspect with finding them through a source
+index, on generated modules of increasing size.
+
+Usage: python -m benchmarks.source_index [NUM_TESTS ...]
+"""
+
+import imp
+import inspect
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from testdoc import finder, reflect, source
+
+
+class NullFinder(object):
+
+    def got_module(self, module):
+        reflect.extract_docs(module)
+
+    def got_test_class(self, klass):
+        reflect.extract_docs(klass)
+
+    def got_test(self, method):
+        reflect.extract_docs(method)
+
+
+class InspectFinder(NullFinder):
+    """Extract documentation the way testdoc did before it had source
+    indexes.
+    """
+
+    def _extract_docs(self, obj):
+        doc = inspect.getdoc(obj)
+        if doc is None:
+            doc = inspect.getcomments(obj)
+        if doc is None:
+            doc = source.find_internal_comments(*inspect.findsource(obj))
+        return doc
+
+    got_module = got_test_class = got_test = _extract_docs
+
+
+def inspect_find_tests(collector, module):
+    get_lineno = lambda obj: inspect.getsourcelines(obj)[1]
+    collector.got_module(module)
+    classes = sorted(reflect.findTestClasses(module), key=get_lineno)
+    for testCaseClass in classes:
+        collector.got_test_class(testCaseClass)
+        methods = [getattr(testCaseClass, 'test%s' % name)
+                   for name in reflect.getTestCaseNames(testCaseClass)]
+        for method in sorted(methods, key=get_lineno):
+            collector.got_test(method)
+
+
+def make_module(directory, num_tests, tests_per_class=50):
+    filename = os.path.join(directory, 'bench_%d.py' % (num_tests,))
+    out = open(filename, 'w')
+    out.write('import unittest\n')
+    for i in range(num_tests):
+        if i % tests_per_class == 0:
+            out.write('\n\n# Comment for class %d.\n' % (i,))
+            out.write('class Test%d(unittest.TestCase):\n' % (i,))
+        out.write('\n    def test_%d(self):\n' % (i,))
+        out.write('        # An internal comment.\n        pass\n')
+    out.close()
+    return imp.load_source('bench_%d' % (num_tests,), filename)
+
+
+def timed(function, *args):
+    start = time.time()
+    function(*args)
+    return time.time() - start
+
+
+def main(sizes):
+    directory = tempfile.mkdtemp()
+    try:
+        print '%8s %12s %12s' % ('tests', 'inspect', 'index')
+        for size in sizes:
+            module = make_module(directory, size)
+            before = timed(inspect_find_tests, InspectFinder(), module)
+            source.clear_indexes()
+            after = timed(finder.find_tests, NullFinder(), module)
+            print '%8d %11.3fs %11.3fs' % (size, before, after)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [500, 1000, 2000, 5000])
@@ -1,3 +1,5 @@
 # Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
 
 """testdoc - a tool to build documentation from Python unit tests."""
+
+__version__ = '0.1'
@@ -0,0 +1,322 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Find tests in compiled modules without importing or parsing them.
+
+When a module's C{.pyc} file is up to date, the code objects in it have
+everything the static finder needs: the module's imports and classes, each
+class's bases and methods, and the docstrings and first line numbers of all
+of them. L{BytecodeFinder} loads them with C{marshal} and recovers a small
+syntax tree of just those statements, which the static finder then treats as
+it would one parsed from source. Modules with no C{.pyc}, or a stale one, are
+parsed from source.
+
+The source is still read for the comments of things without docstrings, and
+to find the 'class' line of decorated classes.
+"""
+
+import ast
+import imp
+import marshal
+import opcode
+import struct
+import types
+
+from testdoc import static
+
+
+MAGIC = imp.get_magic()
+
+if __debug__:
+    COMPILED_SUFFIX = 'c'
+else:
+    COMPILED_SUFFIX = 'o'
+
+
+def load_compiled(filename, mtime):
+    """Load the code object compiled from the source file C{filename}.
+
+    @param mtime: When C{filename} was last modified.
+    @return: A code object, or C{None} if there is no compiled file for
+        C{filename}, or it is out of date.
+    """
+    try:
+        stream = open(filename + COMPILED_SUFFIX, 'rb')
+    except IOError:
+        return None
+    try:
+        header = stream.read(8)
+        if len(header) < 8 or header[:4] != MAGIC:
+            return None
+        if struct.unpack('<I', header[4:])[0] != int(mtime) & 0xFFFFFFFF:
+            return None
+        try:
+            code = marshal.load(stream)
+        except (EOFError, ValueError, TypeError):
+            return None
+    finally:
+        stream.close()
+    if not isinstance(code, types.CodeType):
+        return None
+    return code
+
+
+_HAVE_ARGUMENT = opcode.HAVE_ARGUMENT
+_EXTENDED_ARG = opcode.EXTENDED_ARG
+_op = opcode.opmap
+_LOAD_CONST = _op['LOAD_CONST']
+_STORE_NAMES = frozenset([_op['STORE_NAME'], _op['STORE_GLOBAL']])
+_MAKE_CLOSURE = _op['MAKE_CLOSURE']
+_MAKE_FUNCTIONS = frozenset([_op['MAKE_FUNCTION'], _MAKE_CLOSURE])
+_LOAD_NAMES = frozenset([_op['LOAD_NAME'], _op['LOAD_GLOBAL']])
+_LOAD_ATTR = _op['LOAD_ATTR']
+_IMPORT_NAME = _op['IMPORT_NAME']
+_IMPORT_FROM = _op['IMPORT_FROM']
+_BUILD_SEQUENCES = frozenset([_op['BUILD_TUPLE'], _op['BUILD_LIST']])
+_BUILD_CLASS = _op['BUILD_CLASS']
+_POP_TOP = _op['POP_TOP']
+_DUP_TOP = _op['DUP_TOP']
+# The number of arguments each call instruction takes beyond those counted
+# by its argument.
+_CALLS = {
+    _op['CALL_FUNCTION']: 0,
+    _op['CALL_FUNCTION_VAR']: 1,
+    _op['CALL_FUNCTION_KW']: 1,
+    _op['CALL_FUNCTION_VAR_KW']: 2,
+    }
+del _op
+
+
+def _instructions(code):
+    """Yield the C{(op, argument)} pairs of the instructions in C{code}.
+
+    C{argument} is C{None} for instructions without one.
+    """
+    bytecode = map(ord, code.co_code)
+    i = 0
+    extended = 0
+    end = len(bytecode)
+    while i < end:
+        op = bytecode[i]
+        if op < _HAVE_ARGUMENT:
+            i += 1
+            yield op, None
+            continue
+        argument = bytecode[i + 1] + bytecode[i + 2] * 256 + extended
+        i += 3
+        if op == _EXTENDED_ARG:
+            extended = argument * 65536
+            continue
+        extended = 0
+        yield op, argument
+
+
+# What is on the stack is described by tuples whose first item is one of
+# these.
+_OTHER = ('other',)
+_CONST = 'const'
+_NAME = 'name'
+_MODULE = 'module'
+_FROM = 'from'
+_IMPORTED = 'imported'
+_TUPLE = 'tuple'
+_FUNCTION = 'function'
+_CLASS_BODY = 'class body'
+_CLASS = 'class'
+
+
+def _stores(code):
+    """Yield the C{(name, value)} pairs of the names stored by C{code} in
+    its own namespace, where C{value} describes what was stored if it's
+    something we're interested in.
+
+    Only straight-line statements are understood: anything else forgets what
+    is on the stack.
+    """
+    names = code.co_names
+    consts = code.co_consts
+    stack = []
+
+    def pop(count=1):
+        if count > len(stack):
+            stack[:0] = [_OTHER] * (count - len(stack))
+        values = stack[len(stack) - count:]
+        del stack[len(stack) - count:]
+        return values
+
+    # The commonest instructions in module and class bodies come first.
+    for op, argument in _instructions(code):
+        if op == _LOAD_CONST:
+            stack.append((_CONST, consts[argument]))
+        elif op in _STORE_NAMES:
+            yield names[argument], stack and stack.pop() or _OTHER
+        elif op in _MAKE_FUNCTIONS:
+            function = stack and stack.pop() or _OTHER
+            if op == _MAKE_CLOSURE:
+                pop()
+            pop(argument)
+            if function[0] == _CONST and isinstance(
+                function[1], types.CodeType):
+                stack.append((_FUNCTION, function[1], False))
+            else:
+                stack.append(_OTHER)
+        elif op in _LOAD_NAMES:
+            stack.append((_NAME, names[argument]))
+        elif op == _LOAD_ATTR:
+            value = stack and stack.pop() or _OTHER
+            if value[0] in (_NAME, _MODULE):
+                value = (value[0], '%s.%s' % (value[1], names[argument]))
+            else:
+                value = _OTHER
+            stack.append(value)
+        elif op in _CALLS:
+            positional = argument & 0xFF
+            count = positional + 2 * ((argument >> 8) & 0xFF) + _CALLS[op]
+            arguments = pop(count)
+            function = stack and stack.pop() or _OTHER
+            if function[0] == _FUNCTION and count == 0:
+                stack.append((_CLASS_BODY, function[1]))
+            elif positional == 1 == count and arguments[0][0] in (
+                _FUNCTION, _CLASS):
+                # A decorator.
+                stack.append(arguments[0][:-1] + (True,))
+            else:
+                stack.append(_OTHER)
+        elif op == _BUILD_CLASS:
+            class_name, bases, body = pop(3)
+            if (class_name[0] == _CONST and bases[0] == _TUPLE
+                and body[0] == _CLASS_BODY):
+                stack.append(
+                    (_CLASS, class_name[1], bases[1], body[1], False))
+            else:
+                stack.append(_OTHER)
+        elif op in _BUILD_SEQUENCES:
+            stack.append((_TUPLE, pop(argument)))
+        elif op == _IMPORT_NAME:
+            level, fromlist = pop(2)
+            module = names[argument]
+            if fromlist[0] == _CONST and fromlist[1] is None:
+                # The top-level package is what gets stored.
+                stack.append((_MODULE, module.split('.')[0]))
+            else:
+                stack.append((_FROM, module, max(level[1], 0)))
+        elif op == _IMPORT_FROM:
+            module = stack and stack[-1] or _OTHER
+            if module[0] == _FROM:
+                stack.append(
+                    (_IMPORTED, module[1], module[2], names[argument]))
+            else:
+                stack.append(_OTHER)
+        elif op == _POP_TOP:
+            pop()
+        elif op == _DUP_TOP:
+            stack.append(stack and stack[-1] or _OTHER)
+        else:
+            del stack[:]
+
+
+def _docstring(doc, lineno):
+    if not isinstance(doc, basestring):
+        return []
+    return [ast.Expr(ast.Str(doc, lineno=lineno), lineno=lineno)]
+
+
+def _expression(value):
+    """Return a syntax tree for the base class described by C{value}."""
+    if value[0] != _NAME:
+        return ast.Call()
+    parts = value[1].split('.')
+    expr = ast.Name(parts[0], ast.Load())
+    for part in parts[1:]:
+        expr = ast.Attribute(expr, part, ast.Load())
+    return expr
+
+
+def _function(name, code):
+    doc = None
+    if code.co_consts:
+        doc = code.co_consts[0]
+    lineno = code.co_firstlineno
+    return ast.FunctionDef(
+        name, None, _docstring(doc, lineno), [], lineno=lineno)
+
+
+def _class(name, bases, code, decorated):
+    doc = None
+    body = []
+    for stored, value in _stores(code):
+        if stored == '__doc__' and value[0] == _CONST:
+            doc = value[1]
+        elif value[0] == _FUNCTION and value[1].co_name == stored:
+            body.append(_function(stored, value[1]))
+    lineno = code.co_firstlineno
+    decorators = []
+    if decorated:
+        # Only whether there are any matters.
+        decorators.append(ast.Call())
+    return ast.ClassDef(
+        name, [_expression(base) for base in bases],
+        _docstring(doc, lineno) + body, decorators, lineno=lineno)
+
+
+def decompile(code):
+    """Return a syntax tree of the imports and classes defined by the module
+    code object C{code}, and its docstring.
+
+    The tree has only what L{testdoc.static} looks at: the classes have only
+    their docstrings and methods, and the methods only their docstrings.
+    """
+    body = []
+    for stored, value in _stores(code):
+        kind = value[0]
+        if stored == '__doc__' and kind == _CONST:
+            body[:0] = _docstring(value[1], 1)
+        elif kind == _MODULE:
+            body.append(ast.Import([ast.alias(value[1], stored)]))
+        elif kind == _IMPORTED:
+            module, level, imported = value[1:]
+            body.append(ast.ImportFrom(
+                module or None, [ast.alias(imported, stored)], level))
+        elif kind == _CLASS and value[1] == stored:
+            body.append(_class(*value[1:]))
+    return ast.Module(body)
+
+
+class _CompiledModule(static._ParsedModule):
+    """The parts of a compiled module that we need to find tests.
+
+    The source is only read if it is needed.
+    """
+
+    def __init__(self, name, filename, code):
+        self._lines = None
+        self._scan(name, filename, decompile(code))
+
+
+class BytecodeFinder(static.StaticFinder):
+    """Find tests in compiled modules without importing them, parsing the
+    source of modules that aren't compiled or whose compiled files are out
+    of date.
+
+    @ivar compiled: The number of modules loaded from compiled files.
+    @ivar parsed: The number of modules parsed from source.
+    """
+
+    def __init__(self, test_case_names=static.TEST_CASE_NAMES, path=None):
+        static.StaticFinder.__init__(self, test_case_names, path)
+        self.compiled = 0
+        self.parsed = 0
+
+    def _parse(self, name, filename, mtime):
+        code = load_compiled(filename, mtime)
+        if code is None:
+            self.parsed += 1
+            return static.StaticFinder._parse(self, name, filename, mtime)
+        self.compiled += 1
+        return _CompiledModule(name, filename, code)
+
+
+def find_tests(finder, argument):
+    """Send the tests in C{argument}, a filename or module name, to C{finder}
+    without importing it, using its compiled file if it is up to date.
+    """
+    BytecodeFinder().find_tests(finder, argument)
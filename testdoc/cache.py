@@ -0,0 +1,180 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""An on-disk cache of the tests found in modules.
+
+Each entry is a pickled L{testdoc.model.Module}, keyed by the content of the
+module's source file, the way its tests were found and the version of
+testdoc. A module whose source hasn't changed can then be documented from the
+cache without importing or inspecting it.
+
+Only the module's own source is part of the key. If a test class inherits
+tests from a module that has changed, clear the cache.
+"""
+
+import cPickle as pickle
+import errno
+import hashlib
+import os
+import tempfile
+
+import testdoc
+from testdoc import model, reflect, static
+
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# The version of what is kept in each entry, which is part of its key.
+FORMAT_VERSION = 2
+
+
+def source_filename(argument):
+    """Return the source file of the module named by C{argument}, a filename
+    or a fully-qualified module name, without importing it.
+
+    @return: A filename, or C{None} if the source can't be found.
+    """
+    if os.path.exists(argument):
+        try:
+            return reflect._resolveDirectory(argument)
+        except ValueError:
+            return None
+    return static.find_module_file(argument)
+
+
+class Cache(object):
+    """A directory of cached modules.
+
+    @ivar hits: The number of modules found in the cache.
+    @ivar misses: The number of modules that had to be found afresh.
+    """
+
+    suffix = '.pickle'
+
+    def __init__(self, directory, backend, max_size=DEFAULT_MAX_SIZE):
+        """
+        @param directory: Where to keep the cache. Created if need be.
+        @param backend: The name of the way tests are found, which is part of
+            the key of each entry.
+        @param max_size: The number of bytes the cache may use before the
+            least recently used entries are evicted.
+        """
+        self.directory = directory
+        self.backend = backend
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def key(self, argument):
+        """Return the key for C{argument}, or C{None} if it has no source."""
+        filename = source_filename(argument)
+        if filename is None:
+            return None
+        try:
+            content = open(filename, 'rb').read()
+        except IOError:
+            return None
+        digest = hashlib.sha1()
+        for part in [testdoc.__version__, str(FORMAT_VERSION), self.backend,
+                     argument]:
+            digest.update(part + '\0')
+        digest.update(content)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, argument):
+        """Return the cached L{Module} for C{argument}, or C{None}.
+
+        An entry that can't be loaded, such as one cut short or written by
+        an older testdoc, is removed.
+        """
+        key = self.key(argument)
+        if key is None:
+            self.misses += 1
+            return None
+        path = self._path(key)
+        try:
+            stream = open(path, 'rb')
+        except IOError:
+            self.misses += 1
+            return None
+        try:
+            try:
+                module = pickle.load(stream)
+            finally:
+                stream.close()
+            if not isinstance(module, model.Module):
+                raise TypeError('not a module: %r' % (module,))
+        except Exception:
+            # Unpickling can fail in almost any way.
+            self.misses += 1
+            self._remove(path)
+            return None
+        # Keep track of which entries are used, for eviction.
+        os.utime(path, None)
+        self.hits += 1
+        return module
+
+    def put(self, argument, module):
+        """Cache C{module}, the L{Module} found for C{argument}."""
+        key = self.key(argument)
+        if key is None:
+            return
+        fd, temp = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        try:
+            stream = os.fdopen(fd, 'wb')
+            try:
+                pickle.dump(module, stream, pickle.HIGHEST_PROTOCOL)
+            finally:
+                stream.close()
+            os.rename(temp, self._path(key))
+        except:
+            os.unlink(temp)
+            raise
+
+    def wrap(self, find_tests):
+        """Return a version of C{find_tests} that uses the cache."""
+        def cached_find_tests(finder, argument):
+            module = self.get(argument)
+            if module is None:
+                module = model.record(find_tests, argument)
+                self.put(argument, module)
+            model.emit(finder, module)
+        return cached_find_tests
+
+    def evict(self):
+        """Remove the least recently used entries until the cache is no
+        bigger than C{max_size}.
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self.max_size:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.unlink(path)
+        except OSError, e:
+            if e.errno != errno.ENOENT:
+                raise
+
+    def report(self, stream):
+        stream.write(
+            'testdoc: cache: %d hits, %d misses\n' % (self.hits, self.misses))
@@ -0,0 +1,69 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Find test modules in packages and directories.
+
+Modules are found by their filenames alone, so nothing is imported until it
+is documented, and they are generated one at a time, so the first module can
+be documented before the rest of the tree has been walked.
+"""
+
+import fnmatch
+import os
+
+from testdoc import reflect, static
+
+
+DEFAULT_PATTERN = 'test*.py'
+
+
+def walk(directory, pattern=DEFAULT_PATTERN):
+    """Generate the filenames of test modules under C{directory}.
+
+    Sub-directories are only searched if they are packages. Files and
+    directories are visited in sorted order, so the order is the same on
+    every run.
+
+    @param pattern: A shell-style pattern that the base names of test modules
+        match.
+    """
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = sorted(
+            name for name in dirnames
+            if reflect.isPackageDirectory(os.path.join(dirpath, name)))
+        for name in sorted(filenames):
+            if fnmatch.fnmatch(name, pattern):
+                yield os.path.join(dirpath, name)
+
+
+def walk_package(name, pattern=DEFAULT_PATTERN):
+    """Generate the names of the test modules in the package called C{name},
+    without importing it.
+
+    If C{name} isn't a package, it is generated on its own.
+    """
+    filename = static.find_module_file(name)
+    if filename is None or not os.path.basename(filename).startswith(
+        '__init__.'):
+        yield name
+        return
+    directory = os.path.dirname(filename)
+    for path in walk(directory, pattern):
+        relative = os.path.splitext(os.path.relpath(path, directory))[0]
+        yield '.'.join([name] + relative.split(os.sep))
+
+
+def expand(arguments, pattern=DEFAULT_PATTERN):
+    """Generate the test modules in each of C{arguments}.
+
+    Directories are walked for modules whose names match C{pattern}, as are
+    packages given by name. Anything else is generated as it is.
+    """
+    for argument in arguments:
+        if os.path.isdir(argument):
+            for filename in walk(argument, pattern):
+                yield filename
+        elif os.path.exists(argument):
+            yield argument
+        else:
+            for name in walk_package(argument, pattern):
+                yield name
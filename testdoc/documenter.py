@@ -1,9 +1,14 @@
 # Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
 
+import collections
 import re
 
+from testdoc.model import get_filename, get_lineno
 from testdoc.reflect import extract_docs
 
+
+STOPWORDS = frozenset(['in', 'a', 'the', 'of', 'has'])
+
 def split_name(name):
     bits = name.split('_')
     if len(bits) > 2:
@@ -33,47 +38,173 @@ def gen_split_name(name,
             underscores = ''
 
 
-def title_case(words):
-    titled = []
-    for word in words:
-        if word.lower() in ['in', 'a', 'the', 'of', 'has']:
-            titled.append(word.lower())
-        elif word.upper() == word:
-            titled.append(word)
-        else:
-            titled.append(word.capitalize())
-    titled = ' '.join(titled)
+def title_word(word):
+    lower = word.lower()
+    if lower in STOPWORDS:
+        return lower
+    elif word.upper() == word:
+        return word
+    else:
+        return word.capitalize()
+
+
+def title_case(words, title_word=title_word):
+    titled = ' '.join([title_word(word) for word in words])
     return titled[0].upper() + titled[1:]
 
 
+class LRUCache(object):
+    """A mapping that forgets the least recently used keys once it holds
+    more than C{maxsize} of them.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __getitem__(self, key):
+        value = self._items.pop(key)
+        self._items[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self._items.pop(key, None)
+        self._items[key] = value
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+
+class Humaniser(object):
+    """Turn class and test names into titles, remembering the results.
+
+    The same words and names come up again and again in a large suite, so
+    the titles of words and of whole names are kept in bounded caches.
+    """
+
+    def __init__(self, maxsize=10000):
+        self._words = LRUCache(maxsize)
+        self._tests = LRUCache(maxsize)
+        self._classes = LRUCache(maxsize)
+
+    def title_word(self, word):
+        try:
+            return self._words[word]
+        except KeyError:
+            titled = self._words[word] = title_word(word)
+            return titled
+
+    def title_case(self, words):
+        return title_case(words, self.title_word)
+
+    def _format(self, names, titles, make_title):
+        formatted = []
+        for name in names:
+            try:
+                title = titles[name]
+            except KeyError:
+                title = titles[name] = make_title(name)
+            formatted.append(title)
+        return formatted
+
+    def _test_title(self, test_name):
+        return self.title_case(split_name(test_name)[1:]).lstrip()
+
+    def _class_title(self, class_name):
+        return self.title_case(
+            [bit for bit in split_name(class_name) if bit != 'test'])
+
+    def format_tests(self, test_names):
+        """Return the titles of all of C{test_names}, such as the methods of
+        a test class, in one call.
+        """
+        return self._format(test_names, self._tests, self._test_title)
+
+    def format_test_classes(self, class_names):
+        """Return the titles of all of C{class_names} in one call."""
+        return self._format(class_names, self._classes, self._class_title)
+
+    def format_test(self, test_name):
+        return self.format_tests([test_name])[0]
+
+    def format_test_class(self, class_name):
+        return self.format_test_classes([class_name])[0]
+
+
+_humaniser = Humaniser()
+
+
 class Documenter(object):
+    """A finder that documents the tests it is given with a formatter.
+
+    If the formatter has an C{entry} method, it is called for each module,
+    class and test instead of C{title}, C{section}, C{subsection} and
+    C{paragraph}, with the kind of thing being documented (C{'module'},
+    C{'class'} or C{'test'}), its name, its title, its documentation or
+    C{None}, and the source file and line it is at, if known.
+    """
 
-    def __init__(self, formatter):
+    extract_docs = staticmethod(extract_docs)
+
+    def __init__(self, formatter, humaniser=None):
         self.formatter = formatter
+        if humaniser is None:
+            humaniser = _humaniser
+        self.humaniser = humaniser
+        self._entries = hasattr(formatter, 'entry')
+        self._filename = None
 
     def _append_docs(self, obj):
-        docs = extract_docs(obj)
+        docs = self.extract_docs(obj)
         if docs is not None:
             self.formatter.paragraph(docs)
 
     def format_module(self, module_name):
         return module_name
 
+    def format_tests(self, test_names):
+        return self.humaniser.format_tests(test_names)
+
+    def format_test_classes(self, class_names):
+        return self.humaniser.format_test_classes(class_names)
+
     def format_test(self, test_name):
-        return title_case(split_name(test_name)[1:]).lstrip()
+        return self.format_tests([test_name])[0]
 
     def format_test_class(self, class_name):
-        return title_case(
-            [bit for bit in split_name(class_name) if bit != 'test'])
+        return self.format_test_classes([class_name])[0]
 
     def got_module(self, module):
+        if self._entries:
+            self._filename = get_filename(module)
+            self.formatter.entry(
+                'module', module.__name__, module.__name__,
+                self.extract_docs(module), self._filename, None)
+            return
         self.formatter.title(module.__name__)
         self._append_docs(module)
 
     def got_test(self, method):
+        if self._entries:
+            self.formatter.entry(
+                'test', method.__name__, self.format_test(method.__name__),
+                self.extract_docs(method),
+                get_filename(method) or self._filename, get_lineno(method))
+            return
         self.formatter.subsection(self.format_test(method.__name__))
         self._append_docs(method)
 
     def got_test_class(self, klass):
+        if self._entries:
+            self.formatter.entry(
+                'class', klass.__name__,
+                self.format_test_class(klass.__name__),
+                self.extract_docs(klass), self._filename, get_lineno(klass))
+            return
         self.formatter.section(self.format_test_class(klass.__name__))
         self._append_docs(klass)
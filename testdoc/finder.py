@@ -1,12 +1,12 @@
 # Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
 
-import inspect
+import types
 
-from testdoc import reflect
+from testdoc import reflect, source
 
 
 def get_lineno(obj):
-    return inspect.getsourcelines(obj)[1]
+    return source.get_lineno(obj)
 
 
 def find_tests(finder, module):
@@ -16,7 +16,9 @@ def find_tests(finder, module):
         if testCaseClass.__module__ != module.__name__:
             continue
         finder.got_test_class(testCaseClass)
-        methods = [getattr(testCaseClass, 'test%s' % name)
-                   for name in reflect.getTestCaseNames(testCaseClass)]
+        methods = [types.MethodType(function, None, testCaseClass)
+                   for function in reflect.getTestMethods(testCaseClass)]
         for method in sorted(methods, key=get_lineno):
             finder.got_test(method)
+    # The module's section is done, so we won't need its source again.
+    source.release(module)
@@ -5,9 +5,14 @@
 A formatter is an object which accepts an output stream (usually a file or
 standard output) and then provides a structured way for writing to that stream.
 All formatters should provide 'title', 'section', 'subsection' and 'paragraph'
-methods which write to the stream.
+methods which write to the stream, or an 'entry' method as described by
+L{testdoc.documenter.Documenter}.
 """
 
+import cgi
+import json
+import re
+
 
 class WikiFormatter(object):
     """Moin formatter."""
@@ -22,8 +27,7 @@ class WikiFormatter(object):
         self.writeln('= %s =\n' % (name,))
 
     def section(self, name):
-        self.writeln('')
-        self.writeln('== %s ==\n' % (name,))
+        self.writeln('\n== %s ==\n' % (name,))
 
     def subsection(self, name):
         self.writeln('=== %s ===\n' % (name,))
@@ -42,24 +46,14 @@ class ReSTFormatter(object):
         self.stream.write('%s\n' % (line,))
 
     def title(self, name):
-        self.writeln('%s' % ('=' * len(name),))
-        self.writeln('%s' % (name,))
-        self.writeln('%s' % ('=' * len(name),))
-        self.writeln('')
-        self.writeln('.. contents::')
-        self.writeln('')
-        self.writeln('')
+        rule = '=' * len(name)
+        self.writeln('%s\n%s\n%s\n\n.. contents::\n\n' % (rule, name, rule))
 
     def section(self, name):
-        self.writeln('')
-        self.writeln('%s' % (name,))
-        self.writeln('%s' % ('=' * len(name),))
-        self.writeln('')
+        self.writeln('\n%s\n%s\n' % (name, '=' * len(name)))
 
     def subsection(self, name):
-        self.writeln('%s' % (name,))
-        self.writeln('%s' % ('-' * len(name),))
-        self.writeln('')
+        self.writeln('%s\n%s\n' % (name, '-' * len(name)))
 
     def paragraph(self, text):
         self.writeln('%s\n' % (text.strip(),))
@@ -120,3 +114,67 @@ class ShinyFormatter(object):
             colour = 'yellow'
         for line in text.strip().splitlines(True):
             self.writeln(line.rstrip('\n'), None, colour)
+
+
+class HTMLFormatter(object):
+    """HTML formatter.
+
+    Writes a fragment of HTML, which L{testdoc.site} puts into pages.
+    """
+
+    _blank_line = re.compile(r'\n\s*\n')
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def writeln(self, line):
+        self.stream.write('%s\n' % (line,))
+
+    def title(self, name):
+        self.writeln('<h1>%s</h1>' % (cgi.escape(name),))
+
+    def section(self, name):
+        self.writeln('<h2>%s</h2>' % (cgi.escape(name),))
+
+    def subsection(self, name):
+        self.writeln('<h3>%s</h3>' % (cgi.escape(name),))
+
+    def paragraph(self, text):
+        for block in self._blank_line.split(text.strip()):
+            self.writeln('<p>%s</p>' % (cgi.escape(block.strip()),))
+
+
+class JSONLinesFormatter(object):
+    """One JSON object per line for each module, class and test.
+
+    Each object has the C{kind} of thing it describes (C{"module"},
+    C{"class"} or C{"test"}), its raw C{name}, its C{title}, its C{docs}, and
+    the C{file} and C{line} it is defined at. Anything unknown is C{null}.
+
+    The stream is flushed as each module starts, so that what has been
+    written can be read while the rest is still being found. Each object is
+    written as soon as it is known, so nothing is kept.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def entry(self, kind, name, title, docs, filename, lineno):
+        if kind == 'module':
+            self.stream.flush()
+        record = {
+            'kind': kind,
+            'name': _text(name),
+            'title': _text(title),
+            'docs': _text(docs),
+            'file': _text(filename),
+            'line': lineno,
+            }
+        self.stream.write(json.dumps(record) + '\n')
+
+
+def _text(value):
+    """Return C{value} as unicode, if it is a string, for JSON."""
+    if isinstance(value, str):
+        return value.decode('utf-8', 'replace')
+    return value
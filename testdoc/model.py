@@ -0,0 +1,142 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Plain descriptions of test modules, classes and methods.
+
+These stand in for real modules, classes and methods once their names and
+documentation have been found. Unlike the real things, they can be pickled,
+so they can be sent between processes or saved for later.
+
+The L{Documenter} can use them wherever it would use the real objects: the
+documentation of each is its C{__doc__}.
+"""
+
+from testdoc import source
+from testdoc.reflect import DOCSTRING, extract_docs, find_docs
+
+
+class Module(object):
+    """A test module."""
+
+    def __init__(self, name, doc, filename, classes):
+        self.__name__ = name
+        self.__doc__ = doc
+        self.__file__ = filename
+        self.classes = classes
+
+
+class TestClass(object):
+    """A test case class."""
+
+    def __init__(self, name, doc, module, lineno, tests):
+        self.__name__ = name
+        self.__doc__ = doc
+        self.__module__ = module
+        self.lineno = lineno
+        self.tests = tests
+
+
+class Test(object):
+    """A test method.
+
+    @ivar filename: The source file the test is defined in, which is not the
+        file of its module if it is inherited.
+    @ivar doc_kind: Where its documentation came from, as returned by
+        L{testdoc.reflect.find_docs}, if known.
+    """
+
+    filename = None
+    doc_kind = None
+
+    def __init__(self, name, doc, lineno, filename=None, doc_kind=None):
+        self.__name__ = name
+        self.__doc__ = doc
+        self.lineno = lineno
+        self.filename = filename
+        self.doc_kind = doc_kind
+
+
+def emit(finder, module):
+    """Send the tests in a L{Module} to C{finder}.
+
+    C{finder} gets the same calls, in the same order, as it would from
+    L{testdoc.finder.find_tests}.
+    """
+    finder.got_module(module)
+    for testCaseClass in module.classes:
+        finder.got_test_class(testCaseClass)
+        for test in testCaseClass.tests:
+            finder.got_test(test)
+
+
+def get_lineno(obj):
+    """Return the line number of C{obj}, which is either a real class or
+    method or one of the objects in this module, or C{None} if it isn't
+    known.
+    """
+    try:
+        return source.get_lineno(obj)
+    except IOError:
+        return getattr(obj, 'lineno', None)
+
+
+def get_docs(obj):
+    """Return the documentation of C{obj}, which is either a real method or a
+    L{Test}, and where it came from, as L{testdoc.reflect.find_docs} does.
+    """
+    if not isinstance(obj, Test):
+        return find_docs(obj)
+    if obj.doc_kind is None and obj.__doc__ is not None:
+        # Described before where documentation came from was kept.
+        return obj.__doc__, DOCSTRING
+    return obj.__doc__, obj.doc_kind
+
+
+def get_filename(obj):
+    """Return the source file of C{obj}, which is either a real module or
+    method or one of the objects in this module, or C{None} if it isn't
+    known.
+    """
+    if isinstance(obj, Test):
+        return obj.filename
+    code = getattr(getattr(obj, 'im_func', obj), 'func_code', None)
+    if code is not None:
+        return source.source_filename(code.co_filename)
+    return source.source_filename(getattr(obj, '__file__', None))
+
+
+class Recorder(object):
+    """A finder that describes the tests it is given with a L{Module}.
+
+    @ivar module: The L{Module} for the last module found.
+    """
+
+    def __init__(self):
+        self.module = None
+
+    def got_module(self, module):
+        self.module = Module(
+            module.__name__, extract_docs(module),
+            getattr(module, '__file__', None), [])
+
+    def got_test_class(self, klass):
+        self.module.classes.append(TestClass(
+            klass.__name__, extract_docs(klass), klass.__module__,
+            get_lineno(klass), []))
+
+    def got_test(self, method):
+        doc, doc_kind = get_docs(method)
+        self.module.classes[-1].tests.append(Test(
+            method.__name__, doc, get_lineno(method), get_filename(method),
+            doc_kind))
+
+
+def record(find_tests, *args):
+    """Describe the tests found by C{find_tests}.
+
+    @param find_tests: A callable like L{testdoc.finder.find_tests}, which
+        takes a finder as its first argument.
+    @return: A L{Module}.
+    """
+    recorder = Recorder()
+    find_tests(recorder, *args)
+    return recorder.module
@@ -0,0 +1,39 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Find tests in many modules at once, using a pool of processes.
+
+Each worker finds the tests in one module at a time and sends back a
+L{testdoc.model.Module} describing them. A worker that dies is reported
+against the module it was working on, and replaced. The results come back in
+the order the modules were given, as soon as each is ready and all of the
+ones before it have been handed over.
+"""
+
+from testdoc.sandbox import Sandbox
+
+
+def find_all(find_tests, arguments, jobs, cache=None):
+    """Find the tests in each of C{arguments} using C{jobs} processes.
+
+    @param find_tests: A callable taking a finder and one of C{arguments}.
+        It is passed to the workers when they start.
+    @param arguments: The modules to document, as understood by
+        C{find_tests}.
+    @param jobs: The number of worker processes.
+    @param cache: A L{testdoc.cache.Cache}. If given, modules in the cache
+        aren't sent to the workers, and the modules the workers find are
+        added to it.
+    @return: An iterator of C{(argument, module, error)} tuples, in the same
+        order as C{arguments}. C{module} is a L{testdoc.model.Module}, or
+        C{None} if finding the tests failed, in which case C{error} is the
+        formatted traceback, or says how the worker died.
+    """
+    # The workers of a multiprocessing.Pool can't be told apart when one
+    # dies, so the result it was working on would never come. Those of a
+    # sandbox can, and are replaced.
+    workers = Sandbox(find_tests, jobs)
+    try:
+        for result in workers.find_all(arguments, cache):
+            yield result
+    finally:
+        workers.close()
@@ -0,0 +1,160 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Read source files ahead of when they are needed.
+
+On slow filesystems, like NFS, documenting spends most of its time waiting
+for one source file after another to be read: to import it, to find line
+numbers and comments in it, and to work out which package it is in. Once the
+modules to document are known, a L{Prefetcher} reads their sources in a few
+threads, ahead of the documenting loop, and keeps the text until
+L{testdoc.source.read_source} asks for it.
+
+The threads also read the module's compiled file and look for the
+C{__init__.py} of each package it is in, without keeping them, so that
+importing the module finds them in the operating system's caches.
+"""
+
+import collections
+import os
+import Queue
+import threading
+
+from testdoc.cache import source_filename
+
+
+DEFAULT_THREADS = 4
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+def _warm(filename):
+    """Read C{filename}, if there is one, and throw the contents away."""
+    try:
+        stream = open(filename, 'rb')
+    except IOError:
+        return
+    try:
+        while stream.read(65536):
+            pass
+    finally:
+        stream.close()
+
+
+def _stat_packages(filename):
+    """Look for the C{__init__.py} of each package C{filename} is in, as
+    L{testdoc.reflect.filenameToModuleName} does.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    while os.path.exists(os.path.join(directory, '__init__.py')):
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+
+
+class Prefetcher(object):
+    """Read the sources of modules in background threads.
+
+    The text of each source is handed over once, by L{take}. Sources are kept
+    by their absolute filenames, so it doesn't matter whether a module's
+    C{__file__} names them the same way as the arguments. The modules are
+    expected to be documented in the order they were given to L{fetch}, so
+    when one is taken, those read before it that haven't been taken are
+    dropped. No more is read while the text kept adds up to more than
+    C{max_bytes}.
+
+    @ivar hits: The number of sources taken that had been read ahead.
+    @ivar misses: The number that hadn't.
+    """
+
+    def __init__(self, threads=DEFAULT_THREADS, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._queue = Queue.Queue()
+        self._condition = threading.Condition()
+        self._texts = collections.OrderedDict()
+        self._reading = set()
+        self._closed = False
+        self._threads = []
+        for i in range(threads):
+            thread = threading.Thread(target=self._work)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def fetch(self, arguments):
+        """Start reading the sources of C{arguments}, filenames or names of
+        modules, in order.
+        """
+        for argument in arguments:
+            self._queue.put(argument)
+
+    def _work(self):
+        while True:
+            argument = self._queue.get()
+            if argument is None:
+                return
+            filename = source_filename(argument)
+            if filename is None:
+                continue
+            filename = os.path.abspath(filename)
+            _stat_packages(filename)
+            with self._condition:
+                while self.size > self.max_bytes and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                if filename in self._texts or filename in self._reading:
+                    continue
+                self._reading.add(filename)
+            try:
+                stream = open(filename, 'rU')
+                try:
+                    text = stream.read()
+                finally:
+                    stream.close()
+            except IOError:
+                text = None
+            _warm(filename + 'c')
+            with self._condition:
+                self._reading.discard(filename)
+                if text is not None and not self._closed:
+                    self._texts[filename] = text
+                    self.size += len(text)
+                self._condition.notify_all()
+
+    def take(self, filename):
+        """Return the text of C{filename}, waiting for it if it is being
+        read, or C{None} if it hasn't been read ahead.
+        """
+        filename = os.path.abspath(filename)
+        with self._condition:
+            while filename in self._reading:
+                self._condition.wait()
+            if filename not in self._texts:
+                self.misses += 1
+                return None
+            self.hits += 1
+            while True:
+                earlier, text = self._texts.popitem(last=False)
+                self.size -= len(text)
+                if earlier == filename:
+                    break
+            self._condition.notify_all()
+            return text
+
+    def close(self):
+        """Stop reading, and forget everything that has been read."""
+        with self._condition:
+            self._closed = True
+            self._texts.clear()
+            self.size = 0
+            self._condition.notify_all()
+        for thread in self._threads:
+            self._queue.put(None)
+
+    def report(self, stream):
+        stream.write('testdoc: prefetch: %d hits, %d misses\n' % (
+            self.hits, self.misses))
@@ -6,40 +6,151 @@ import imp
 import inspect
 import os
 import sys
-import traceback
 import types
+import weakref
 
+from testdoc import source
 
-def namedAny(name):
-    """Get a fully named package, module, module-global object, or attribute.
+
+class InvalidName(ValueError):
+    """The given name is not a dot-separated list of Python objects."""
+
+
+class ModuleNotFound(InvalidName):
+    """No module could be found for any prefix of the given name."""
+
+
+class Resolver(object):
+    """Find the modules and objects named by dotted names and filenames,
+    remembering what it finds along the way.
+
+    Resolving many names that share packages, or many files in the same
+    directories, only imports or looks at each of them once. Because of that,
+    a resolver assumes that no modules or packages are added while it is in
+    use; make a new one, or L{clear} it, when they might be.
     """
-    names = name.split('.')
-    topLevelPackage = None
-    moduleNames = names[:]
-    while not topLevelPackage:
-        try:
-            trialname = '.'.join(moduleNames)
-            topLevelPackage = __import__(trialname)
-        except ImportError:
-            # if the ImportError happened in the module being imported,
-            # this is a failure that should be handed to our caller.
-            # count stack frames to tell the difference.
-            exc_info = sys.exc_info()
-            if len(traceback.extract_tb(exc_info[2])) > 1:
-                try:
+
+    def __init__(self):
+        # Directory -> dotted name of the package it is, or '' if it isn't.
+        self._packages = {}
+        # Name -> how many of its parts name a module that can be imported.
+        self._prefixes = {}
+        # Names of modules that could not be found.
+        self._missing = set()
+
+    def clear(self):
+        """Forget everything found so far."""
+        self._packages.clear()
+        self._prefixes.clear()
+        self._missing.clear()
+
+    def _importPrefix(self, name, names):
+        """Import the longest prefix of C{names} that is a module.
+
+        @return: The top-level package of that module.
+        @raise ModuleNotFound: If there is no such prefix.
+        """
+        for length in xrange(self._prefixes.get(name, len(names)), 0, -1):
+            trialname = '.'.join(names[:length])
+            if trialname in self._missing:
+                continue
+            try:
+                topLevelPackage = __import__(trialname)
+            except ImportError:
+                # If the ImportError happened in the module being imported,
+                # this is a failure that should be handed to our caller. If
+                # it came from __import__ itself, there is no frame below
+                # ours in the traceback.
+                exc_info = sys.exc_info()
+                if exc_info[2].tb_next is not None:
                     # Clean up garbage left in sys.modules.
-                    del sys.modules[trialname]
-                except KeyError:
-                    # Python 2.4 has fixed this.  Yay!
-                    pass
-                raise exc_info[0], exc_info[1], exc_info[2]
-            moduleNames.pop()
+                    sys.modules.pop(trialname, None)
+                    raise exc_info[0], exc_info[1], exc_info[2]
+                self._missing.add(trialname)
+                continue
+            self._prefixes[name] = length
+            return topLevelPackage
+        raise ModuleNotFound('No module named %s' % (name,))
+
+    def namedAny(self, name):
+        """Get a fully named package, module, module-global object, or
+        attribute.
+
+        @raise ModuleNotFound: If no prefix of C{name} is a module.
+        @raise AttributeError: If the rest of C{name} can't be found in the
+            module.
+        """
+        names = name.split('.')
+        obj = self._importPrefix(name, names)
+        for n in names[1:]:
+            obj = getattr(obj, n)
+        return obj
+
+    def _packageName(self, directory):
+        try:
+            return self._packages[directory]
+        except KeyError:
+            pass
+        name = ''
+        if os.path.exists(os.path.join(directory, "__init__.py")):
+            name = os.path.basename(directory)
+            parent = os.path.dirname(directory)
+            if parent != directory:
+                package = self._packageName(parent)
+                if package:
+                    name = "%s.%s" % (package, name)
+        self._packages[directory] = name
+        return name
+
+    def filenameToModuleName(self, fn):
+        """Convert a name in the filesystem to the name of the Python module
+        it is. See L{filenameToModuleName}.
+        """
+        base = os.path.basename(fn)
+        if not base:
+            # this happens when fn ends with a path separator, just skit it
+            base = os.path.basename(fn[:-1])
+        modName = os.path.splitext(base)[0]
+        package = self._packageName(os.path.dirname(os.path.abspath(fn)))
+        if package:
+            modName = "%s.%s" % (package, modName)
+        return modName
+
+    def filenameToModule(self, fn):
+        """Return a module object matching the file C{fn}. See
+        L{filenameToModule}.
+        """
+        if not os.path.exists(fn):
+            raise ValueError("%r doesn't exist" % (fn,))
+        try:
+            ret = self.namedAny(self.filenameToModuleName(fn))
+        except (ValueError, AttributeError):
+            # Couldn't find module.  The file 'fn' is not in PYTHONPATH
+            return _importFromFile(fn)
+        # ensure that the loaded module matches the file
+        retFile = os.path.splitext(ret.__file__)[0] + '.py'
+        # not all platforms (e.g. win32) have os.path.samefile
+        same = getattr(os.path, 'samefile', samefile)
+        if os.path.isfile(fn) and not same(fn, retFile):
+            del sys.modules[ret.__name__]
+            ret = _importFromFile(fn)
+        return ret
+
+
+def resolve_many(names):
+    """Get the objects named by each of C{names}, as L{namedAny} does, but
+    sharing the work of importing the packages they have in common.
+
+    @return: A list of the objects, in the same order as C{names}.
+    """
+    resolver = Resolver()
+    return [resolver.namedAny(name) for name in names]
 
-    obj = topLevelPackage
-    for n in names[1:]:
-        obj = getattr(obj, n)
 
-    return obj
+def namedAny(name):
+    """Get a fully named package, module, module-global object, or attribute.
+    """
+    return Resolver().namedAny(name)
 
 
 def filenameToModuleName(fn):
@@ -52,19 +163,7 @@ def filenameToModuleName(fn):
     unless you already know that the filename you're talking about is a Python
     module.
     """
-    fullName = os.path.abspath(fn)
-    base = os.path.basename(fn)
-    if not base:
-        # this happens when fn ends with a path separator, just skit it
-        base = os.path.basename(fn[:-1])
-    modName = os.path.splitext(base)[0]
-    while 1:
-        fullName = os.path.dirname(fullName)
-        if os.path.exists(os.path.join(fullName, "__init__.py")):
-            modName = "%s.%s" % (os.path.basename(fullName), modName)
-        else:
-            break
-    return modName
+    return Resolver().filenameToModuleName(fn)
 
 
 def samefile(filename1, filename2):
@@ -87,21 +186,7 @@ def filenameToModule(fn):
     @return: A module object.
     @raise ValueError: If C{fn} does not exist.
     """
-    if not os.path.exists(fn):
-        raise ValueError("%r doesn't exist" % (fn,))
-    try:
-        ret = namedAny(filenameToModuleName(fn))
-    except (ValueError, AttributeError):
-        # Couldn't find module.  The file 'fn' is not in PYTHONPATH
-        return _importFromFile(fn)
-    # ensure that the loaded module matches the file
-    retFile = os.path.splitext(ret.__file__)[0] + '.py'
-    # not all platforms (e.g. win32) have os.path.samefile
-    same = getattr(os.path, 'samefile', samefile)
-    if os.path.isfile(fn) and not same(fn, retFile):
-        del sys.modules[ret.__name__]
-        ret = _importFromFile(fn)
-    return ret
+    return Resolver().filenameToModule(fn)
 
 
 def _importFromFile(fn, moduleName=None):
@@ -118,6 +203,17 @@ def _importFromFile(fn, moduleName=None):
     return module
 
 
+def isPackageDirectory(dirname):
+    """Is the directory at path 'dirname' a Python package directory?
+    Returns the name of the __init__ file (it may have a weird extension)
+    if dirname is a package directory.  Otherwise, returns False"""
+    for ext in 'py', 'so', 'pyd', 'dll':
+        initFile = '__init__.' + ext
+        if os.path.exists(os.path.join(dirname, initFile)):
+            return initFile
+    return False
+
+
 def _resolveDirectory(fn):
     if os.path.isdir(fn):
         initFile = isPackageDirectory(fn)
@@ -152,6 +248,73 @@ def getTestCaseNames(klass, methodPrefix='test'):
     return prefixedMethodNames(klass, methodPrefix)
 
 
+_ownMethodTables = weakref.WeakKeyDictionary()
+_methodTables = weakref.WeakKeyDictionary()
+
+
+def _ownMethodTable(klass, prefix):
+    """Map the names in C{klass}'s own namespace that start with C{prefix} to
+    the functions they name, or to C{None} if they don't name a function.
+    """
+    tables = _ownMethodTables.setdefault(klass, {})
+    try:
+        return tables[prefix]
+    except KeyError:
+        pass
+    table = {}
+    for name, value in klass.__dict__.items():
+        if name.startswith(prefix) and len(name) > len(prefix):
+            if type(value) is types.FunctionType:
+                table[name] = value
+            else:
+                table[name] = None
+    tables[prefix] = table
+    return table
+
+
+def _methodTable(klass, prefix):
+    """Like L{_ownMethodTable}, but including the names inherited from the
+    bases of C{klass}, resolved in method resolution order.
+    """
+    tables = _methodTables.setdefault(klass, {})
+    try:
+        return tables[prefix]
+    except KeyError:
+        pass
+    bases = klass.__bases__
+    if len(bases) == 1:
+        # The MRO of a class with one base is the class followed by the MRO
+        # of its base, so we can start from the base's table.
+        table = dict(_methodTable(bases[0], prefix))
+    elif hasattr(klass, '__mro__'):
+        table = {}
+        for base in reversed(klass.__mro__[1:]):
+            table.update(_ownMethodTable(base, prefix))
+    else:
+        # Classic classes search their bases depth-first, left to right.
+        table = {}
+        for base in reversed(bases):
+            table.update(_methodTable(base, prefix))
+    table.update(_ownMethodTable(klass, prefix))
+    tables[prefix] = table
+    return table
+
+
+def getTestMethods(klass, methodPrefix='test'):
+    """
+    Given a class that contains C{TestCase}s, return a list of the functions
+    that implement the methods that probably contain tests, including
+    inherited ones.
+
+    The methods of each class are only looked up once, and the tables for
+    subclasses are built from those of their bases, so this is cheap for
+    large hierarchies of test classes.
+    """
+    table = _methodTable(klass, methodPrefix)
+    return [function for function in table.itervalues()
+            if function is not None]
+
+
 def prefixedMethodNames(classObj, prefix):
     """A list of method names with a given prefix in a given class.
     """
@@ -189,32 +352,47 @@ def _strip_comments(comment):
     return '\n'.join(line.strip('#').strip() for line in comment.splitlines())
 
 
-def extract_docs(obj):
+# Where the documentation of an object came from.
+DOCSTRING = 'docstring'
+COMMENTS = 'comments'
+
+
+def find_docs(obj):
+    """Return the documentation of C{obj}, as L{extract_docs} does, and where
+    it came from: L{DOCSTRING}, L{COMMENTS}, or C{None} if there is none.
+    """
     doc = inspect.getdoc(obj)
-    if doc is None:
-        doc = _strip_comments(inspect.getcomments(obj))
+    if doc is not None:
+        return doc, DOCSTRING
+    doc = _strip_comments(get_comments(obj))
     if doc is None:
         doc = _strip_comments(get_internal_comments(obj))
-    return doc
+    if doc is None:
+        return None, None
+    return doc, COMMENTS
 
 
-def get_internal_comments(object):
-    lines, lnum = inspect.findsource(object)
-    if len(lines) <= lnum + 1:
-        # object is probably an emply module.
+def extract_docs(obj):
+    return find_docs(obj)[0]
+
+
+def get_comments(object):
+    """Return the comments preceding the source of C{object}, as
+    C{inspect.getcomments} does, or C{None}.
+    """
+    found = source.findsource(object)
+    if found is None:
         return None
-    indent = inspect.indentsize(lines[lnum+1])
-
-    comments = []
-    for line in lines[lnum + 1:]:
-        comment = line.strip()
-        # A line is a comment if it matches the indentation the first line and
-        # begins with a '#'
-        if inspect.indentsize(line) == indent and comment.startswith('#'):
-            comments.append(comment)
-        else:
-            break
-    if len(comments) == 0:
+    index, lnum, module = found
+    return index.comments(lnum, module)
+
+
+def get_internal_comments(object):
+    """Return the comments at the start of the source of C{object}, or
+    C{None}.
+    """
+    found = source.findsource(object)
+    if found is None:
         return None
-    else:
-        return '\n'.join(comments)
+    index, lnum, module = found
+    return index.internal_comments(lnum, module)
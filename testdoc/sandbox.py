@@ -0,0 +1,269 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Find tests in worker processes that can be killed.
+
+Importing a test module runs its code, which might hang, use all of the
+memory there is, or leave things behind that affect the modules imported after
+it. A L{Sandbox} finds the tests in each module in a worker process instead.
+A module that takes too long is reported and its worker killed; the memory a
+worker may use can be limited; and each worker is replaced after documenting
+a number of modules.
+
+Like L{testdoc.parallel}, the results come back in the order the modules
+were given, as L{testdoc.model.Module}s.
+"""
+
+import errno
+import multiprocessing
+import select
+import signal
+import time
+import traceback
+
+from testdoc import model
+
+
+class SandboxError(Exception):
+    """The tests in a module could not be found in a worker.
+
+    The message is the worker's traceback, or why the worker was killed.
+    """
+
+
+def record(find_tests, argument):
+    """Find the tests in C{argument} with C{find_tests}, in this process.
+
+    @return: An C{(argument, module, error)} tuple. C{module} is a
+        L{testdoc.model.Module}, or C{None} if finding the tests failed, in
+        which case C{error} is the formatted traceback.
+    """
+    try:
+        return argument, model.record(find_tests, argument), None
+    except KeyboardInterrupt:
+        raise
+    except BaseException:
+        # Anything that goes wrong belongs to this module alone.
+        return argument, None, traceback.format_exc()
+
+
+def _serve(connection, find_tests, memory_limit):
+    """Find the tests in each argument received on C{connection}, and send
+    back the results, until C{None} is received.
+    """
+    # Interrupting testdoc kills the workers, rather than each of them
+    # reporting it.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if memory_limit is not None:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    while True:
+        try:
+            argument = connection.recv()
+        except EOFError:
+            break
+        if argument is None:
+            break
+        connection.send(record(find_tests, argument))
+
+
+class _Worker(object):
+    """A worker process, finding the tests in at most one module at a time.
+
+    @ivar count: The number of modules it has been given.
+    @ivar index: The position of the module it is working on.
+    """
+
+    def __init__(self, find_tests, memory_limit):
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_serve, args=(child, find_tests, memory_limit))
+        self.process.daemon = True
+        self.process.start()
+        child.close()
+        self.count = 0
+        self.index = None
+        self.argument = None
+        self.deadline = None
+
+    def fileno(self):
+        return self.connection.fileno()
+
+    def start(self, index, argument, timeout):
+        self.index = index
+        self.argument = argument
+        self.count += 1
+        if timeout is not None:
+            self.deadline = time.time() + timeout
+        self.connection.send(argument)
+
+    def collect(self, timeout):
+        """Return the result for the module being worked on, or C{None} if
+        it isn't ready yet.
+
+        If the module has taken longer than C{timeout}, the worker is killed
+        and the result is an error.
+        """
+        if self.connection.poll():
+            try:
+                return self.connection.recv()
+            except EOFError:
+                self.kill()
+                return (self.argument, None, 'Worker exited with code %s.\n'
+                        % (self.process.exitcode,))
+        if self.deadline is not None and time.time() >= self.deadline:
+            self.kill()
+            return (self.argument, None,
+                    'Timed out after %g seconds.\n' % (timeout,))
+        return None
+
+    @property
+    def alive(self):
+        return self.process.is_alive()
+
+    def stop(self):
+        """Ask the worker to exit once it is idle."""
+        try:
+            self.connection.send(None)
+        except (IOError, OSError):
+            pass
+        self.connection.close()
+        self.process.join()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        if not self.connection.closed:
+            self.connection.close()
+
+
+class Sandbox(object):
+    """Find tests in worker processes, with limits on each module.
+
+    Idle workers are kept between calls, so that a sandbox used for many
+    modules only starts a new worker when one is killed or has documented
+    C{max_modules} modules. Call L{close} to stop them.
+    """
+
+    def __init__(self, find_tests, jobs=1, timeout=None, memory_limit=None,
+                 max_modules=None):
+        """
+        @param find_tests: A callable taking a finder and an argument. It is
+            passed to the workers when they start.
+        @param jobs: The number of modules to work on at once.
+        @param timeout: The number of seconds a worker may spend on one
+            module, or C{None} for no limit.
+        @param memory_limit: The number of bytes of address space a worker
+            may use, or C{None} for no limit.
+        @param max_modules: The number of modules a worker documents before
+            it is replaced, or C{None} to keep it for as long as it lives.
+        """
+        self._find_tests = find_tests
+        self.jobs = jobs
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.max_modules = max_modules
+        self._idle = []
+
+    def _worker(self):
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.alive:
+                return worker
+            worker.kill()
+        return _Worker(self._find_tests, self.memory_limit)
+
+    def _release(self, worker):
+        if not worker.alive:
+            worker.kill()
+        elif (self.max_modules is not None
+              and worker.count >= self.max_modules):
+            worker.stop()
+        else:
+            self._idle.append(worker)
+
+    def _wait(self, busy):
+        """Wait until one of the C{busy} workers has something to say, or
+        the earliest deadline passes.
+        """
+        deadlines = [worker.deadline for worker in busy
+                     if worker.deadline is not None]
+        wait = None
+        if deadlines:
+            wait = max(0, min(deadlines) - time.time())
+        try:
+            select.select(busy, [], [], wait)
+        except select.error, e:
+            if e.args[0] != errno.EINTR:
+                raise
+
+    def find_all(self, arguments, cache=None):
+        """Find the tests in each of C{arguments}.
+
+        @param cache: A L{testdoc.cache.Cache}. If given, modules in the
+            cache aren't sent to the workers, and the modules the workers
+            find are added to it.
+        @return: An iterator of C{(argument, module, error)} tuples, in the
+            same order as C{arguments}, as returned by L{record}.
+        """
+        arguments = enumerate(arguments)
+        exhausted = False
+        started = 0
+        next_index = 0
+        done = {}
+        busy = []
+        try:
+            while True:
+                while (not exhausted and len(busy) < self.jobs
+                       and started - next_index < self.jobs * 4):
+                    try:
+                        index, argument = arguments.next()
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    started += 1
+                    module = None
+                    if cache is not None:
+                        module = cache.get(argument)
+                    if module is not None:
+                        done[index] = (argument, module, None)
+                        continue
+                    worker = self._worker()
+                    worker.start(index, argument, self.timeout)
+                    busy.append(worker)
+                while next_index in done:
+                    yield done.pop(next_index)
+                    next_index += 1
+                if not busy:
+                    if exhausted:
+                        break
+                    continue
+                self._wait(busy)
+                for worker in busy[:]:
+                    result = worker.collect(self.timeout)
+                    if result is None:
+                        continue
+                    busy.remove(worker)
+                    if cache is not None and result[1] is not None:
+                        cache.put(result[0], result[1])
+                    done[worker.index] = result
+                    self._release(worker)
+        finally:
+            # Anything still going is for a caller that has gone away.
+            for worker in busy:
+                worker.kill()
+
+    def find_tests(self, finder, argument):
+        """Send the tests in C{argument} to C{finder}.
+
+        @raise SandboxError: If they couldn't be found.
+        """
+        for argument, module, error in self.find_all([argument]):
+            if module is None:
+                raise SandboxError(error)
+            model.emit(finder, module)
+
+    def close(self):
+        """Stop the idle workers."""
+        while self._idle:
+            self._idle.pop().stop()
@@ -0,0 +1,272 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Search the documentation of tests.
+
+A L{SearchIndex} is an inverted index, kept in an SQLite database, of the
+words in the titles and documentation of modules, classes and tests. An
+L{Indexer} is a formatter that adds what the L{Documenter} sends it to an
+index, replacing what was there for each module, so the index can be kept up
+to date as modules are documented. Modules whose documentation hasn't changed
+are left alone.
+
+Searches return the entries that have all of the words searched for, most
+relevant first.
+"""
+
+import array
+import hashlib
+import heapq
+import itertools
+import math
+import re
+import sqlite3
+
+from testdoc import documenter, model
+
+
+# The postings for each word are kept in one row per module, as arrays of
+# entry ids and weights, so that replacing a module's entries only touches
+# its own rows, and a search reads one row per module for each word.
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS modules (
+    name TEXT PRIMARY KEY,
+    hash TEXT
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    module TEXT,
+    kind TEXT,
+    path TEXT,
+    title TEXT,
+    file TEXT,
+    line INTEGER
+);
+CREATE INDEX IF NOT EXISTS entries_module ON entries (module);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT,
+    module TEXT,
+    entries BLOB,
+    weights BLOB
+);
+CREATE INDEX IF NOT EXISTS postings_term ON postings (term);
+CREATE INDEX IF NOT EXISTS postings_module ON postings (module);
+'''
+
+# Words in titles count for more than words in documentation.
+TITLE_WEIGHT = 2
+
+# Words are split at changes of case and between letters and numbers, as in
+# names like 'TestHTTPThing0', so that they match their humanised titles.
+_wordRE = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+')
+
+
+def words(text):
+    """Return the words in C{text} that are indexed and searched for."""
+    if not text:
+        return []
+    return [word.lower() for word in _wordRE.findall(text)]
+
+
+class Hit(object):
+    """An entry found by a search.
+
+    @ivar kind: C{'module'}, C{'class'} or C{'test'}.
+    @ivar path: The fully-qualified name of what was found.
+    @ivar score: How relevant it is. Higher is better.
+    """
+
+    def __init__(self, kind, path, title, filename, lineno, score):
+        self.kind = kind
+        self.path = path
+        self.title = title
+        self.filename = filename
+        self.lineno = lineno
+        self.score = score
+
+    def location(self):
+        """Return where the entry is, as C{file:line}."""
+        if self.lineno is None:
+            return self.filename
+        return '%s:%d' % (self.filename, self.lineno)
+
+
+class SearchIndex(object):
+    """An inverted index of entries for modules, classes and tests, in the
+    SQLite database at C{path}.
+
+    Changes are kept in a transaction until L{commit} or L{close}.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.text_factory = str
+        self._db.executescript(SCHEMA)
+
+    def module_hash(self, name):
+        """Return the hash of the entries indexed for the module C{name}, or
+        C{None} if it isn't indexed.
+        """
+        row = self._db.execute(
+            'SELECT hash FROM modules WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            return None
+        return row[0]
+
+    def remove_module(self, name):
+        """Remove the entries for the module C{name}."""
+        self._db.execute('DELETE FROM postings WHERE module = ?', (name,))
+        self._db.execute('DELETE FROM entries WHERE module = ?', (name,))
+        self._db.execute('DELETE FROM modules WHERE name = ?', (name,))
+
+    def replace_module(self, name, entries):
+        """Make C{entries} the entries for the module C{name}.
+
+        @param entries: A list of C{(kind, path, title, docs, filename,
+            lineno)} tuples.
+        @return: True if the entries have changed since they were last
+            indexed.
+        """
+        digest = hashlib.sha1(repr(entries)).hexdigest()
+        if self.module_hash(name) == digest:
+            return False
+        self.remove_module(name)
+        self._db.execute(
+            'INSERT INTO modules (name, hash) VALUES (?, ?)', (name, digest))
+        postings = {}
+        for kind, path, title, docs, filename, lineno in entries:
+            entry = self._db.execute(
+                'INSERT INTO entries (module, kind, path, title, file, line) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (name, kind, path, title, filename, lineno)).lastrowid
+            terms = words(title) * TITLE_WEIGHT + words(path) + words(docs)
+            counts = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            # Long entries mention everything; each word counts for less.
+            norm = math.sqrt(len(terms))
+            for term, count in counts.iteritems():
+                if term not in postings:
+                    postings[term] = (array.array('l'), array.array('f'))
+                postings[term][0].append(entry)
+                postings[term][1].append(count / norm)
+        self._db.executemany(
+            'INSERT INTO postings (term, module, entries, weights) '
+            'VALUES (?, ?, ?, ?)',
+            [(term, name, buffer(ids.tostring()), buffer(weights.tostring()))
+             for term, (ids, weights) in postings.iteritems()])
+        return True
+
+    def _postings(self, term):
+        """Return a dict mapping the ids of the entries with C{term} to its
+        weight in each.
+        """
+        found = {}
+        for ids, weights in self._db.execute(
+            'SELECT entries, weights FROM postings WHERE term = ?', (term,)):
+            entries = array.array('l')
+            entries.fromstring(str(ids))
+            values = array.array('f')
+            values.fromstring(str(weights))
+            found.update(itertools.izip(entries, values))
+        return found
+
+    def search(self, query, limit=10):
+        """Find the entries that have all of the words in C{query}.
+
+        @return: A list of at most C{limit} L{Hit}s, best first.
+        """
+        terms = set(words(query))
+        if not terms:
+            return []
+        postings = sorted(
+            [self._postings(term) for term in terms], key=len)
+        if not postings[0]:
+            return []
+        total = self._db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        weighted = [(math.log(1.0 + float(total) / len(found)), found)
+                    for found in postings]
+        rarest_idf, rarest = weighted[0]
+        others = weighted[1:]
+        scores = []
+        for entry, weight in rarest.iteritems():
+            score = weight * rarest_idf
+            for idf, found in others:
+                other = found.get(entry)
+                if other is None:
+                    break
+                score += other * idf
+            else:
+                scores.append((score, entry))
+        scores = heapq.nlargest(limit, scores)
+        if not scores:
+            return []
+        entries = dict(
+            (row[0], row[1:]) for row in self._db.execute(
+                'SELECT id, kind, path, title, file, line FROM entries '
+                'WHERE id IN (%s)' % (', '.join('?' * len(scores)),),
+                [entry for score, entry in scores]))
+        return [Hit(*(entries[entry] + (score,))) for score, entry in scores]
+
+    def commit(self):
+        self._db.commit()
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+
+
+class Indexer(object):
+    """A formatter that adds what it is sent to a L{SearchIndex}.
+
+    The entries for each module are kept until the next module starts, or
+    L{finish} is called, and then replace those in the index.
+
+    @ivar changed: The names of the modules whose entries have changed.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.changed = []
+        self._module = None
+        self._class = None
+        self._entries = []
+
+    def entry(self, kind, name, title, docs, filename, lineno):
+        if kind == 'module':
+            self.finish()
+            self._module = name
+            path = name
+        elif kind == 'class':
+            self._class = name
+            path = '%s.%s' % (self._module, name)
+        else:
+            path = '%s.%s.%s' % (self._module, self._class, name)
+        self._entries.append((kind, path, title, docs, filename, lineno))
+
+    def finish(self):
+        """Index the entries of the last module."""
+        if self._module is not None:
+            if self.index.replace_module(self._module, self._entries):
+                self.changed.append(self._module)
+        self._module = None
+        self._class = None
+        self._entries = []
+
+
+class IndexOutput(object):
+    """Add modules to a L{SearchIndex} as they change.
+
+    This can be used as the output of a L{testdoc.watch.Watcher}.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    def __call__(self, modules, changed):
+        indexer = Indexer(self.index)
+        doc = documenter.Documenter(indexer)
+        for module in changed:
+            model.emit(doc, module)
+        indexer.finish()
+        self.index.commit()
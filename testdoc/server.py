@@ -0,0 +1,219 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""A server that keeps test modules loaded between requests for their
+documentation.
+
+Running testdoc over and over, as editors and commit hooks do, pays for
+starting Python and importing every test module and its dependencies each
+time. C{testdoc serve} starts a L{Server} on a Unix domain socket instead,
+and C{testdoc --socket} asks it for documentation. The server keeps the tests
+found in each module, and only finds them again when the module's source file
+changes.
+
+Each request is one line of JSON, as is its response::
+
+    {"arguments": ["foo.test_bar"], "format": "moin", "backend": "import",
+     "recursive": false, "pattern": "test*.py", "cwd": "/home/me/foo"}
+    {"output": "...", "errors": "", "failed": false}
+
+Only a module's own source file is watched. If something it imports changes,
+restart the server.
+"""
+
+import cStringIO
+import errno
+import json
+import os
+import socket
+import SocketServer
+import sys
+
+from testdoc import discovery, watch
+
+
+class Documentation(object):
+    """Answer requests for documentation, keeping the tests found in each
+    module.
+
+    @ivar backends: A dict mapping backend names to C{find_tests} callables,
+        as taken by L{watch.Watcher}.
+    @ivar formats: A dict mapping format names to formatter classes.
+    """
+
+    def __init__(self, backends, formats):
+        self.backends = backends
+        self.formats = formats
+        self._watchers = {}
+
+    def _watcher(self, backend):
+        if backend not in self._watchers:
+            self._watchers[backend] = watch.Watcher(
+                self.backends[backend], [], None)
+        return self._watchers[backend]
+
+    def handle(self, request):
+        """Document the modules in C{request}.
+
+        @param request: A dict with the C{arguments} to document, and the
+            names of the C{format} and C{backend} to use. If C{recursive} is
+            true, the test modules in packages and directories are
+            documented, as with L{discovery.expand}, using C{pattern}. If
+            C{cwd} is given, filenames and module names are found from that
+            directory rather than the server's, as they would be by the
+            client.
+        @return: A dict with the C{output}, any C{errors}, and whether any
+            module C{failed}.
+        """
+        cwd = request.get('cwd')
+        if cwd is None:
+            return self._handle(request)
+        previous = os.getcwd()
+        try:
+            os.chdir(cwd.encode('utf-8'))
+        except OSError, e:
+            return _failure('could not change to %s: %s\n' % (cwd, e))
+        # Module names are looked for from there too, as the client would.
+        sys.path.insert(0, os.getcwd())
+        try:
+            return self._handle(request)
+        finally:
+            sys.path.remove(os.getcwd())
+            os.chdir(previous)
+
+    def _handle(self, request):
+        format = request.get('format', 'moin')
+        backend = request.get('backend', 'import')
+        if format not in self.formats:
+            return _failure('unknown format: %r\n' % (format,))
+        if backend not in self.backends:
+            return _failure('unknown backend: %r\n' % (backend,))
+        arguments = [argument.encode('utf-8')
+                     for argument in request.get('arguments', [])]
+        errors = cStringIO.StringIO()
+        try:
+            if request.get('recursive'):
+                arguments = list(discovery.expand(
+                    arguments,
+                    request.get('pattern', discovery.DEFAULT_PATTERN)))
+            # The same relative filename means different files to clients in
+            # different directories, so the modules are kept by absolute
+            # filenames.
+            arguments = [_absolute(argument) for argument in arguments]
+            watcher = self._watcher(backend)
+            # Modules that failed before are only looked at again when they
+            # change, so their errors are reported from what the watcher
+            # remembers rather than as they happen.
+            watcher.errors = cStringIO.StringIO()
+            watcher.refresh(arguments)
+        except ImportError, e:
+            return _failure('%s\n' % (e,))
+        for argument in arguments:
+            if argument in watcher.failed:
+                errors.write('testdoc: could not document %s:\n%s' % (
+                    argument, watcher.failed[argument]))
+        modules = [watcher.modules[argument] for argument in arguments
+                   if argument in watcher.modules]
+        output = cStringIO.StringIO()
+        watch.render(self.formats[format], modules, output)
+        return {
+            'output': output.getvalue(),
+            'errors': errors.getvalue(),
+            'failed': bool(errors.getvalue()),
+            }
+
+
+def _absolute(argument):
+    """Return C{argument} as an absolute filename, if it is a filename."""
+    if os.path.exists(argument):
+        return os.path.abspath(argument)
+    return argument
+
+
+def _failure(message):
+    return {'output': '', 'errors': 'testdoc: ' + message, 'failed': True}
+
+
+class _Handler(SocketServer.StreamRequestHandler):
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # Someone checking that the server is up.
+            return
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response = _failure('bad request: %r\n' % (line,))
+        else:
+            response = self.server.documentation.handle(request)
+        self.wfile.write(json.dumps(response) + '\n')
+
+
+class Server(SocketServer.UnixStreamServer):
+    """Answer requests on the Unix domain socket at C{path}.
+
+    Requests are handled one at a time, because finding tests imports
+    modules.
+    """
+
+    def __init__(self, path, documentation):
+        self.documentation = documentation
+        _remove_stale_socket(path)
+        SocketServer.UnixStreamServer.__init__(self, path, _Handler)
+
+    def server_close(self):
+        SocketServer.UnixStreamServer.server_close(self)
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def _remove_stale_socket(path):
+    """Remove the socket at C{path} if no server is listening on it.
+
+    @raise socket.error: If a server is listening on it.
+    """
+    if not os.path.exists(path):
+        return
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except socket.error, e:
+        if e.errno not in (errno.ECONNREFUSED, errno.ENOENT):
+            raise
+        os.unlink(path)
+    else:
+        raise socket.error(
+            errno.EADDRINUSE, 'testdoc is already serving on %s' % (path,))
+    finally:
+        client.close()
+
+
+def serve(path, documentation):
+    """Answer requests on the socket at C{path} until interrupted."""
+    server = Server(path, documentation)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def request(path, message):
+    """Send C{message} to the server on the socket at C{path}.
+
+    @return: The server's response, as described by L{Documentation.handle}.
+    @raise socket.error: If there is no server there.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+        client.sendall(json.dumps(message) + '\n')
+        client.shutdown(socket.SHUT_WR)
+        stream = client.makefile('rb')
+        try:
+            return json.loads(stream.read())
+        finally:
+            stream.close()
+    finally:
+        client.close()
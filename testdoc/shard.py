@@ -0,0 +1,258 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Split the modules to document between several runs, and merge the results.
+
+A big suite can be documented on several machines at once with C{testdoc
+--shard I/N}. L{partition} splits the modules between the shards in a way
+that depends only on the modules and their costs, so every shard agrees on
+it without talking to the others. Each shard writes the modules it found to a
+file with L{ShardWriter}, along with their positions in the whole list, and
+C{testdoc merge} reads them back with L{merge}, in the order that documenting
+all of the modules in one run would give.
+
+A module's cost is the size of its source file, or, better, the seconds it
+took in an earlier run, which L{merge} records for L{write_costs}.
+"""
+
+import cPickle as pickle
+import hashlib
+import heapq
+import json
+import os
+import time
+
+import testdoc
+from testdoc.cache import source_filename
+
+
+# The version of the format of shard files.
+FORMAT_VERSION = 2
+
+
+class ShardError(Exception):
+    """Shard files are missing, damaged or don't belong together."""
+
+
+def parse_shard(text):
+    """Parse a shard given as C{I/N}, where C{1 <= I <= N}.
+
+    @return: A C{(index, count)} pair, with C{index} counting from 1.
+    @raise ValueError: If C{text} isn't a shard.
+    """
+    try:
+        index, count = [int(part) for part in text.split('/')]
+    except ValueError:
+        raise ValueError('%r is not of the form I/N' % (text,))
+    if not 1 <= index <= count:
+        raise ValueError('%r is not a shard from 1/N to N/N' % (text,))
+    return index, count
+
+
+def load_costs(filename):
+    """Load the costs written by L{write_costs}.
+
+    @return: A dict mapping arguments to seconds, which is empty if there is
+        no C{filename}.
+    """
+    try:
+        stream = open(filename)
+    except IOError:
+        return {}
+    try:
+        costs = json.load(stream)
+    finally:
+        stream.close()
+    return dict((argument.encode('utf-8'), seconds)
+                for argument, seconds in costs.iteritems())
+
+
+def write_costs(filename, costs):
+    """Write C{costs}, a dict mapping arguments to seconds, to C{filename}."""
+    stream = open(filename, 'w')
+    try:
+        json.dump(costs, stream, indent=0, sort_keys=True)
+    finally:
+        stream.close()
+
+
+def file_size(argument):
+    """Return the size of the source file of C{argument}, or 0 if it can't
+    be found.
+    """
+    filename = source_filename(argument)
+    if filename is None:
+        return 0
+    try:
+        return os.path.getsize(filename)
+    except OSError:
+        return 0
+
+
+def partition(arguments, count, costs=None):
+    """Split C{arguments} between C{count} shards of about equal cost.
+
+    The costliest modules are given out first, each to the shard that has
+    cost the least so far, the lowest-numbered shard in a tie.
+
+    @param costs: A dict mapping arguments to their costs, in seconds. If
+        not given, or empty, the sizes of the modules' files are used.
+        Arguments that have no cost recorded are assumed to cost the average
+        of those that do.
+    @return: A list of C{count} lists of positions in C{arguments}, each in
+        order.
+    """
+    if costs:
+        default = sum(costs.itervalues()) / len(costs)
+        cost = lambda argument: costs.get(argument, default)
+    else:
+        cost = file_size
+    weights = [cost(argument) for argument in arguments]
+    order = sorted(range(len(arguments)),
+                   key=lambda position: (-weights[position], position))
+    loads = [(0, shard) for shard in range(count)]
+    shards = [[] for shard in range(count)]
+    for position in order:
+        load, shard = heapq.heappop(loads)
+        shards[shard].append(position)
+        heapq.heappush(loads, (load + weights[position], shard))
+    for positions in shards:
+        positions.sort()
+    return shards
+
+
+def run_digest(arguments, backend):
+    """Return a digest of the whole list of C{arguments}, in order, and the
+    name of the C{backend} that finds their tests, which shards of the same
+    run share.
+    """
+    digest = hashlib.sha1()
+    for part in [backend] + list(arguments):
+        digest.update(part + '\0')
+    return digest.hexdigest()
+
+
+class ShardWriter(object):
+    """Write the results of one shard to C{stream}.
+
+    The file is a series of pickles: a header describing the shard, then one
+    C{(position, argument, module, error, seconds)} tuple for each module, in
+    order. C{seconds} is the time since the previous module's result, which
+    is what the module cost if its tests were found one module at a time.
+
+    The header has the L{run_digest} of the run and the positions of the
+    shard's modules, so that L{merge} can tell that the shards belong
+    together before it returns anything.
+    """
+
+    def __init__(self, stream, index, count, arguments, positions,
+                 backend='', clock=time.time):
+        """
+        @param arguments: All of the modules of the run, in order.
+        @param positions: The positions in C{arguments} of this shard's
+            share of them.
+        @param backend: The name of the way their tests are found.
+        """
+        self.stream = stream
+        self.clock = clock
+        self._dump({
+            'version': FORMAT_VERSION,
+            'testdoc': testdoc.__version__,
+            'shard': index,
+            'count': count,
+            'total': len(arguments),
+            'digest': run_digest(arguments, backend),
+            'positions': sorted(positions),
+            })
+        self._last = clock()
+
+    def _dump(self, obj):
+        pickle.dump(obj, self.stream, pickle.HIGHEST_PROTOCOL)
+
+    def add(self, position, argument, module, error):
+        now = self.clock()
+        self._dump((position, argument, module, error, now - self._last))
+        self._last = now
+
+
+def _read(stream, filename):
+    try:
+        return pickle.load(stream)
+    except EOFError:
+        raise
+    except Exception, e:
+        raise ShardError('%s is damaged: %s' % (filename, e))
+
+
+def _records(stream, filename):
+    while True:
+        try:
+            yield _read(stream, filename)
+        except EOFError:
+            return
+
+
+def merge(streams, costs=None):
+    """Merge the shard files in C{streams} into the results a single run
+    would give.
+
+    @param streams: A dict mapping filenames to open shard files.
+    @param costs: If given, a dict to which the seconds each module took are
+        added.
+    @return: An iterator of C{(argument, module, error)} tuples, as returned
+        by L{testdoc.parallel.find_all}, in order.
+    @raise ShardError: If the shards don't belong together or aren't all
+        there, or if a file is damaged. The shards are checked before
+        anything is returned, except that a file cut short is only noticed
+        when the merge gets to where it ends.
+    """
+    headers = {}
+    for filename, stream in sorted(streams.items()):
+        try:
+            header = _read(stream, filename)
+        except EOFError:
+            raise ShardError('%s is empty' % (filename,))
+        if (not isinstance(header, dict)
+            or header.get('version') != FORMAT_VERSION):
+            raise ShardError('%s is not a shard file' % (filename,))
+        if header['testdoc'] != testdoc.__version__:
+            raise ShardError('%s was written by testdoc %s' % (
+                filename, header['testdoc']))
+        if header['shard'] in headers:
+            raise ShardError('%s and %s are both shard %d' % (
+                headers[header['shard']][0], filename, header['shard']))
+        headers[header['shard']] = filename, header
+    if not headers:
+        return iter([])
+    runs = set((header['count'], header['total'], header['digest'])
+               for filename, header in headers.values())
+    if len(runs) > 1:
+        raise ShardError('the shards are from different runs')
+    [(count, total, digest)] = runs
+    missing = sorted(set(range(1, count + 1)) - set(headers))
+    if missing:
+        raise ShardError('missing shards: %s' % (
+            ', '.join('%d/%d' % (index, count) for index in missing),))
+    positions = []
+    for filename, header in headers.values():
+        positions.extend(header['positions'])
+    if sorted(positions) != range(total):
+        # Each shard split the same modules differently, as when --costs
+        # changed between them.
+        raise ShardError('the shards did not share out the modules alike')
+    return _merge(
+        [_records(streams[filename], filename)
+         for filename, header in headers.values()], total, costs)
+
+
+def _merge(readers, total, costs):
+    expected = 0
+    for position, argument, module, error, seconds in heapq.merge(*readers):
+        if position != expected:
+            break
+        expected += 1
+        if costs is not None:
+            costs[argument] = seconds
+        yield argument, module, error
+    if expected != total:
+        raise ShardError('module %d of %d is missing from the shards' % (
+            expected + 1, total))
@@ -0,0 +1,212 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Where formatters write to.
+
+Formatters write a little at a time: a heading here, a line there. A sink
+stands in for the stream they are given and collects those writes into large
+blocks, so that a slow stream, like a pipe or a file on a network
+filesystem, is written to rarely and in big pieces.
+
+A L{StreamSink} writes everything to one stream. The other sinks put the
+documentation of each module somewhere of its own: a file in a directory
+with a L{DirectorySink}, or a member of an archive with a L{TarSink} or
+L{ZipSink}. They are told where each module starts by a L{ModuleSplitter},
+which goes in front of the L{Documenter} as a finder.
+"""
+
+import cStringIO
+import os
+import tarfile
+import time
+import zipfile
+
+from testdoc import watch
+
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+class StreamSink(object):
+    """Write to C{stream} in blocks of at least C{buffer_size} bytes.
+
+    What has been written is passed on when the buffer is full, and when the
+    sink is flushed or closed.
+    """
+
+    def __init__(self, stream, close=False, buffer_size=DEFAULT_BUFFER_SIZE):
+        """
+        @param close: Whether to close C{stream} when the sink is closed.
+        """
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._close = close
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data):
+        self._chunks.append(data)
+        self._size += len(data)
+        if self._size >= self.buffer_size:
+            self._spill()
+
+    def _spill(self):
+        if self._chunks:
+            data = ''.join(self._chunks)
+            self._chunks = []
+            self._size = 0
+            self.stream.write(data)
+
+    def start_module(self, name):
+        pass
+
+    def flush(self):
+        self._spill()
+        self.stream.flush()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self._close:
+                self.stream.close()
+
+
+class _ModuleSink(object):
+    """A sink that keeps what is written about each module until the next
+    one starts, then stores it.
+
+    Subclasses define C{_store(filename, data)}, which is given the name of
+    the module followed by C{extension}, and the encoded documentation.
+    """
+
+    def __init__(self, extension):
+        self.extension = extension
+        self._module = None
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(data)
+
+    def _finish(self):
+        if self._module is not None:
+            data = ''.join(self._chunks)
+            if isinstance(data, unicode):
+                data = data.encode('utf-8')
+            self._store(self._module + self.extension, data)
+        self._module = None
+        self._chunks = []
+
+    def start_module(self, name):
+        self._finish()
+        self._module = name
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self._finish()
+
+
+class DirectorySink(_ModuleSink):
+    """Write the documentation of each module to its own file in
+    C{directory}, named after the module and ending in C{extension}.
+
+    Each file is replaced in one step.
+    """
+
+    def __init__(self, directory, extension):
+        _ModuleSink.__init__(self, extension)
+        self.directory = directory
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _store(self, filename, data):
+        watch.write_atomically(
+            os.path.join(self.directory, filename),
+            lambda stream: stream.write(data))
+
+
+class TarSink(_ModuleSink):
+    """Write the documentation of each module to its own member of a
+    gzipped tar archive, written to C{stream} as it goes.
+
+    C{stream} doesn't have to be seekable, so this can write to a pipe.
+    """
+
+    def __init__(self, stream, extension, close=False):
+        _ModuleSink.__init__(self, extension)
+        self.stream = stream
+        self._close = close
+        self._archive = tarfile.open(fileobj=stream, mode='w|gz')
+
+    def _store(self, filename, data):
+        info = tarfile.TarInfo(filename)
+        info.size = len(data)
+        info.mtime = time.time()
+        info.mode = 0644
+        self._archive.addfile(info, cStringIO.StringIO(data))
+
+    def close(self):
+        try:
+            _ModuleSink.close(self)
+            self._archive.close()
+        finally:
+            if self._close:
+                self.stream.close()
+
+
+class ZipSink(_ModuleSink):
+    """Write the documentation of each module to its own member of a zip
+    archive in C{filename}.
+    """
+
+    def __init__(self, filename, extension):
+        _ModuleSink.__init__(self, extension)
+        self._archive = zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED)
+
+    def _store(self, filename, data):
+        info = zipfile.ZipInfo(filename, time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0644 << 16
+        self._archive.writestr(info, data)
+
+    def close(self):
+        try:
+            _ModuleSink.close(self)
+        finally:
+            self._archive.close()
+
+
+def open_sink(filename, extension, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Return a sink writing to C{filename}.
+
+    Filenames ending in C{.tar.gz} or C{.tgz} get a L{TarSink}, and those
+    ending in C{.zip} a L{ZipSink}, whose members end in C{extension}.
+    Anything else is written as one file.
+    """
+    if filename.endswith(('.tar.gz', '.tgz')):
+        return TarSink(open(filename, 'wb'), extension, close=True)
+    if filename.endswith('.zip'):
+        return ZipSink(filename, extension)
+    return StreamSink(open(filename, 'w'), True, buffer_size)
+
+
+class ModuleSplitter(object):
+    """A finder that tells C{sinks} where each module starts, then passes
+    everything on to C{finder}.
+    """
+
+    def __init__(self, finder, sinks):
+        self.finder = finder
+        self.sinks = sinks
+
+    def got_module(self, module):
+        for sink in self.sinks:
+            sink.start_module(module.__name__)
+        self.finder.got_module(module)
+
+    def got_test_class(self, klass):
+        self.finder.got_test_class(klass)
+
+    def got_test(self, method):
+        self.finder.got_test(method)
@@ -0,0 +1,178 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Write documentation as a static HTML site.
+
+A L{Site} writes one page for each module, using the L{HTMLFormatter}, and an
+index page linking to all of them. A hash of what each page was made from is
+kept next to the pages, so that updating the site only writes the pages of
+modules that have changed. Each file is replaced in one step, and the index
+last, so a site that is being updated can still be served.
+"""
+
+import cgi
+import cStringIO
+import hashlib
+import json
+import os
+import urllib
+
+import testdoc
+from testdoc import documenter, model, watch
+from testdoc.formatter import HTMLFormatter
+
+
+PAGE = '''\
+<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>%(title)s</title>
+</head>
+<body>
+%(navigation)s
+%(body)s</body>
+</html>
+'''
+
+
+def module_hash(module):
+    """Return a hash of everything on the page for C{module}, a
+    L{testdoc.model.Module}.
+    """
+    digest = hashlib.sha1(testdoc.__version__)
+
+    def add(obj):
+        digest.update('\0%r\0%r' % (obj.__name__, obj.__doc__))
+    add(module)
+    for testCaseClass in module.classes:
+        add(testCaseClass)
+        for test in testCaseClass.tests:
+            add(test)
+    return digest.hexdigest()
+
+
+def _count_tests(module):
+    return sum(len(testCaseClass.tests) for testCaseClass in module.classes)
+
+
+class Site(object):
+    """An HTML site documenting modules, in a directory.
+
+    A site can be used as the output of a L{testdoc.watch.Watcher}.
+
+    @ivar hashes: A dict mapping the names of the modules on the site to the
+        hashes of their pages, as returned by L{module_hash}.
+    """
+
+    MANIFEST = '.testdoc-hashes'
+    INDEX = 'index.html'
+
+    def __init__(self, directory, title='Tests'):
+        self.directory = directory
+        self.title = title
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.hashes, self._index_hash = self._read_manifest()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def page_name(self, module_name):
+        return module_name + '.html'
+
+    def _read_manifest(self):
+        try:
+            stream = open(self._path(self.MANIFEST))
+        except IOError:
+            return {}, None
+        try:
+            try:
+                manifest = json.load(stream)
+            except ValueError:
+                return {}, None
+        finally:
+            stream.close()
+        hashes = dict((name.encode('utf-8'), digest)
+                      for name, digest in manifest['pages'].items())
+        return hashes, manifest['index']
+
+    def _write_manifest(self):
+        manifest = {'pages': self.hashes, 'index': self._index_hash}
+        watch.write_atomically(
+            self._path(self.MANIFEST),
+            lambda stream: json.dump(manifest, stream, sort_keys=True))
+
+    def _write_page(self, filename, title, body, navigation):
+        page = PAGE % {
+            'title': cgi.escape(title),
+            'navigation': navigation,
+            'body': body,
+            }
+        watch.write_atomically(
+            self._path(filename), lambda stream: stream.write(page))
+
+    def render_module(self, module):
+        """Return the body of the page for C{module}."""
+        stream = cStringIO.StringIO()
+        model.emit(documenter.Documenter(HTMLFormatter(stream)), module)
+        return stream.getvalue()
+
+    def render_index(self, modules):
+        """Return the body of the index page, linking to C{modules}."""
+        lines = ['<h1>%s</h1>' % (cgi.escape(self.title),), '<ul>']
+        for module in modules:
+            summary = ''
+            if module.__doc__:
+                summary = ' &mdash; ' + cgi.escape(
+                    module.__doc__.strip().splitlines()[0])
+            lines.append('<li><a href="%s">%s</a>%s (%d tests)</li>' % (
+                urllib.quote(self.page_name(module.__name__)),
+                cgi.escape(module.__name__), summary, _count_tests(module)))
+        lines.append('</ul>')
+        return '\n'.join(lines) + '\n'
+
+    def update(self, modules):
+        """Make the site document C{modules}, in order.
+
+        Only the pages of modules that have changed since the site was last
+        updated are written. The pages of modules that are no longer in
+        C{modules} are removed.
+
+        @return: A list of the names of the files written.
+        """
+        written = []
+        navigation = '<p><a href="%s">%s</a></p>' % (
+            self.INDEX, cgi.escape(self.title))
+        names = set()
+        for module in modules:
+            name = module.__name__
+            names.add(name)
+            digest = module_hash(module)
+            filename = self.page_name(name)
+            if (self.hashes.get(name) == digest
+                and os.path.exists(self._path(filename))):
+                continue
+            self._write_page(
+                filename, name, self.render_module(module), navigation)
+            self.hashes[name] = digest
+            written.append(filename)
+        index = self.render_index(modules)
+        index_hash = hashlib.sha1(index).hexdigest()
+        if (index_hash != self._index_hash
+            or not os.path.exists(self._path(self.INDEX))):
+            self._write_page(self.INDEX, self.title, index, '')
+            self._index_hash = index_hash
+            written.append(self.INDEX)
+        removed = set(self.hashes) - names
+        for name in removed:
+            try:
+                os.unlink(self._path(self.page_name(name)))
+            except OSError:
+                pass
+            del self.hashes[name]
+        if written or removed:
+            self._write_manifest()
+        return written
+
+    def __call__(self, modules, changed):
+        self.update(modules)
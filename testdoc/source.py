@@ -0,0 +1,475 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Indexes of the classes, functions and comments in source files.
+
+C{inspect.findsource} scans the whole of a file every time it is asked about
+a class, and C{inspect.getcomments} calls it again. Documenting a module with
+thousands of tests that way takes time proportional to the square of its
+size. Instead, we build a L{SourceIndex} for each file once and look things up
+in it.
+
+The indexes are kept in an L{IndexCache} with a memory budget, rather than
+keeping the lines of every file in C{linecache} for the life of the process.
+"""
+
+import bisect
+import collections
+import inspect
+import re
+import sys
+import tokenize
+import types
+
+
+_classRE = re.compile(r'^(\s*)class\s*(\w+)')
+_functionRE = re.compile(r'^(\s*def\s)|(.*(?<!\w)lambda(:|\s))|^(\s*@)')
+
+
+def _is_comment(line):
+    return line.lstrip()[:1] == '#'
+
+
+def find_comments(lines, lnum, module=False, comment_lines=None):
+    """Find the comments immediately preceding a block of source.
+
+    This behaves like C{inspect.getcomments}, except that it works on source
+    lines we already have rather than on a live object.
+
+    @param lines: The lines of the source file.
+    @param lnum: The index of the first line of the block in C{lines}.
+    @param module: If true, look for a comment block at the top of the file,
+        as C{inspect.getcomments} does for modules.
+    @param comment_lines: The indexes of the lines that are comments. If not
+        given, any line starting with '#' is taken to be a comment, even if
+        it is inside a string.
+    @return: The comment lines joined together, or C{None}.
+    """
+    if comment_lines is None:
+        is_comment = lambda i: _is_comment(lines[i])
+    else:
+        is_comment = comment_lines.__contains__
+    if module:
+        start = 0
+        if lines and lines[0][:2] == '#!':
+            start = 1
+        while start < len(lines) and lines[start].strip() in ('', '#'):
+            start += 1
+        if start < len(lines) and lines[start][:1] == '#' and is_comment(
+            start):
+            comments = []
+            end = start
+            while (end < len(lines) and lines[end][:1] == '#'
+                   and is_comment(end)):
+                comments.append(lines[end].expandtabs())
+                end += 1
+            return ''.join(comments)
+        return None
+    if lnum <= 0:
+        return None
+    indent = inspect.indentsize(lines[lnum])
+    comments = []
+    end = lnum - 1
+    while end >= 0:
+        if not is_comment(end) or inspect.indentsize(lines[end]) != indent:
+            break
+        comments.insert(0, lines[end].expandtabs().lstrip())
+        end -= 1
+    if not comments:
+        return None
+    while comments and comments[0].strip() == '#':
+        del comments[0]
+    while comments and comments[-1].strip() == '#':
+        del comments[-1]
+    return ''.join(comments)
+
+
+def find_internal_comments(lines, lnum, comment_lines=None):
+    """Find the run of comments that begins the body of a block of source.
+
+    @param lines: The lines of the source file.
+    @param lnum: The index of the first line of the block in C{lines}.
+    @param comment_lines: As for L{find_comments}.
+    @return: The comment lines joined together, or C{None}.
+    """
+    if len(lines) <= lnum + 1:
+        # object is probably an emply module.
+        return None
+    if comment_lines is None:
+        is_comment = lambda i: _is_comment(lines[i])
+    else:
+        is_comment = comment_lines.__contains__
+    indent = inspect.indentsize(lines[lnum+1])
+
+    comments = []
+    for i in xrange(lnum + 1, len(lines)):
+        line = lines[i]
+        # A line is a comment if it matches the indentation the first line and
+        # begins with a '#'
+        if inspect.indentsize(line) == indent and is_comment(i):
+            comments.append(line.strip())
+        else:
+            break
+    if len(comments) == 0:
+        return None
+    else:
+        return '\n'.join(comments)
+
+
+def scan_tokens(lines):
+    """Find the blocks and comments in some source with one pass of
+    C{tokenize}.
+
+    Unlike regular expressions, the tokenizer can tell comments and
+    definitions from text that only looks like them inside strings.
+
+    @return: A C{(classes, functions, comment_lines)} tuple. C{classes} is
+        a list of C{(name, indent, lnum)} tuples for each 'class' statement.
+        C{functions} is a list of the line numbers of each 'def' statement,
+        decorator and lambda. C{comment_lines} is a set of the line numbers
+        of the lines that hold nothing but a comment.
+    @raise tokenize.TokenError: If the source can't be tokenized.
+    """
+    classes = []
+    functions = []
+    comment_lines = set()
+    at_start = True
+    class_line = None
+    for kind, string, (row, col), end, line in tokenize.generate_tokens(
+        iter(lines).next):
+        lnum = row - 1
+        if kind == tokenize.COMMENT:
+            if not line[:col].strip():
+                comment_lines.add(lnum)
+            continue
+        if kind == tokenize.NEWLINE:
+            at_start = True
+            continue
+        if kind in (tokenize.NL, tokenize.INDENT, tokenize.DEDENT):
+            continue
+        if class_line is not None:
+            if kind == tokenize.NAME:
+                classes.append((string, lines[class_line][:col0], class_line))
+            class_line = None
+        if at_start:
+            at_start = False
+            col0 = col
+            if kind == tokenize.NAME and string == 'class':
+                class_line = lnum
+            elif ((kind == tokenize.NAME and string == 'def')
+                  or (kind == tokenize.OP and string == '@')):
+                functions.append(lnum)
+        if kind == tokenize.NAME and string == 'lambda':
+            if not functions or functions[-1] != lnum:
+                functions.append(lnum)
+    return classes, functions, comment_lines
+
+
+def scan_lines(lines):
+    """Find the blocks in some source the way C{inspect.findsource} does,
+    with regular expressions.
+
+    @return: The same as L{scan_tokens}, except that C{comment_lines} is
+        C{None}.
+    """
+    classes = []
+    functions = []
+    for lnum, line in enumerate(lines):
+        match = _classRE.match(line)
+        if match is not None:
+            classes.append((match.group(2), match.group(1), lnum))
+        elif _functionRE.match(line) is not None:
+            functions.append(lnum)
+    return classes, functions, None
+
+
+class SourceIndex(object):
+    """The line numbers and comments of every block in a source file.
+
+    Line numbers are indexes into the lines of the file, as returned by
+    C{inspect.findsource}.
+
+    The source is tokenized to find the blocks and comments. If that fails,
+    because the source is not valid Python, we fall back to regular
+    expressions, as C{inspect} does.
+    """
+
+    def __init__(self, lines):
+        self._classes = {}
+        self._comments = {}
+        self._internal_comments = {}
+        try:
+            classes, functions, comment_lines = scan_tokens(lines)
+        except (tokenize.TokenError, IndentationError):
+            classes, functions, comment_lines = scan_lines(lines)
+        self._functions = functions
+        best = {}
+        for name, indent, lnum in classes:
+            # Pick the same definition as inspect.findsource: the first at
+            # the top level, otherwise the least indented.
+            candidate = (indent != '', indent, lnum)
+            if name not in best or candidate < best[name]:
+                best[name] = candidate
+            self._add_block(lines, lnum, comment_lines)
+        for lnum in functions:
+            self._add_block(lines, lnum, comment_lines)
+        for name, (nested, indent, lnum) in best.items():
+            self._classes[name] = lnum
+        self._module_comments = find_comments(
+            lines, 0, module=True, comment_lines=comment_lines)
+        self._module_internal_comments = find_internal_comments(
+            lines, 0, comment_lines)
+
+    def _add_block(self, lines, lnum, comment_lines):
+        comments = find_comments(lines, lnum, comment_lines=comment_lines)
+        if comments is not None:
+            self._comments[lnum] = comments
+        comments = find_internal_comments(lines, lnum, comment_lines)
+        if comments is not None:
+            self._internal_comments[lnum] = comments
+
+    def class_line(self, name):
+        """Return the line number of the class called C{name}.
+
+        @raise IOError: If there is no such class.
+        """
+        try:
+            return self._classes[name]
+        except KeyError:
+            raise IOError('could not find class definition')
+
+    def function_line(self, firstlineno):
+        """Return the line number of the function whose code starts at line
+        C{firstlineno} (counting from 1, as code objects do).
+        """
+        i = bisect.bisect_right(self._functions, firstlineno - 1)
+        if i == 0:
+            return 0
+        return self._functions[i - 1]
+
+    def comments(self, lnum, module=False):
+        """Return the comments preceding the block at C{lnum}, as
+        C{inspect.getcomments} would, or C{None}.
+        """
+        if module:
+            return self._module_comments
+        return self._comments.get(lnum)
+
+    def internal_comments(self, lnum, module=False):
+        """Return the comments at the start of the block at C{lnum}, or
+        C{None}.
+        """
+        if module:
+            return self._module_internal_comments
+        return self._internal_comments.get(lnum)
+
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+_prefetcher = None
+
+
+def set_prefetcher(prefetcher):
+    """Take source files from C{prefetcher}, a
+    L{testdoc.prefetch.Prefetcher}, if it has read them, or stop if it is
+    C{None}.
+    """
+    global _prefetcher
+    _prefetcher = prefetcher
+
+
+def read_source(filename):
+    """Return the text of the source file C{filename}.
+
+    @raise IOError: If it can't be read.
+    """
+    if _prefetcher is not None:
+        text = _prefetcher.take(filename)
+        if text is not None:
+            return text
+    stream = open(filename, 'rU')
+    try:
+        return stream.read()
+    finally:
+        stream.close()
+
+
+def read_lines(filename, module_globals=None):
+    """Read the lines of C{filename}.
+
+    If the file can't be read, but C{module_globals} has a PEP 302 loader
+    that can get the source, as for modules imported from zip files, that is
+    used instead.
+
+    @return: A list of lines, which is empty if there is no source.
+    """
+    try:
+        return read_source(filename).splitlines(True)
+    except IOError:
+        pass
+    if module_globals is None or '__loader__' not in module_globals:
+        return []
+    get_source = getattr(module_globals['__loader__'], 'get_source', None)
+    if get_source is None:
+        return []
+    try:
+        text = get_source(module_globals.get('__name__'))
+    except (ImportError, IOError):
+        return []
+    if not text:
+        return []
+    return text.splitlines(True)
+
+
+class IndexCache(object):
+    """The L{SourceIndex}es of source files, most recently used last.
+
+    Unlike C{linecache}, we don't keep the lines of the files, only their
+    indexes, and once the files the indexes were built from add up to more
+    than C{max_bytes}, the least recently used are forgotten.
+
+    @ivar size: The total size of the files currently indexed.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = collections.OrderedDict()
+
+    def __contains__(self, filename):
+        return filename in self._entries
+
+    def get(self, filename, module_globals=None):
+        """Return the L{SourceIndex} for C{filename}, building it if need be.
+
+        @return: A L{SourceIndex}, or C{None} if there is no source for
+            C{filename}.
+        """
+        try:
+            entry = self._entries.pop(filename)
+        except KeyError:
+            lines = read_lines(filename, module_globals)
+            if lines:
+                entry = (SourceIndex(lines), sum(map(len, lines)))
+            else:
+                entry = (None, 0)
+            self.size += entry[1]
+        self._entries[filename] = entry
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            oldest, (index, size) = self._entries.popitem(last=False)
+            self.size -= size
+        return entry[0]
+
+    def forget(self, filename):
+        """Forget the index of C{filename}."""
+        entry = self._entries.pop(filename, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def clear(self):
+        """Forget all of the indexes."""
+        self._entries.clear()
+        self.size = 0
+
+
+_indexes = IndexCache()
+
+
+def get_index(filename, module_globals=None):
+    """Return the L{SourceIndex} for C{filename}, building it if need be.
+
+    @return: A L{SourceIndex}, or C{None} if there is no source for
+        C{filename}.
+    """
+    return _indexes.get(filename, module_globals)
+
+
+def set_max_bytes(max_bytes):
+    """Set the total size of the source files whose indexes are kept."""
+    _indexes.max_bytes = max_bytes
+
+
+def get_max_bytes():
+    """Return the total size of the source files whose indexes are kept."""
+    return _indexes.max_bytes
+
+
+def clear_indexes():
+    """Forget all of the indexes that have been built."""
+    _indexes.clear()
+
+
+def forget(filename):
+    """Forget the index of C{filename}, because it has changed or is no
+    longer needed.
+    """
+    _indexes.forget(filename)
+
+
+def release(module):
+    """Forget the index of the source of C{module}, which has been
+    documented.
+    """
+    filename = source_filename(getattr(module, '__file__', None))
+    if filename is not None:
+        forget(filename)
+
+
+def source_filename(filename):
+    """Return the name of the source file for the compiled file
+    C{filename}, or C{filename} itself if it is source.
+    """
+    if filename is None:
+        return None
+    if filename[-4:].lower() in ('.pyc', '.pyo'):
+        filename = filename[:-4] + '.py'
+    return filename
+
+
+def findsource(obj):
+    """Find the index of the source of C{obj}, and where C{obj} is in it.
+
+    @param obj: A module, class, method or function.
+    @return: A C{(index, lnum, is_module)} tuple, or C{None} if the source
+        can't be found.
+    """
+    if isinstance(obj, types.ModuleType):
+        filename = source_filename(getattr(obj, '__file__', None))
+        if filename is None:
+            return None
+        index = get_index(filename, obj.__dict__)
+        if index is None:
+            return None
+        return index, 0, True
+    if isinstance(obj, (type, types.ClassType)):
+        module = sys.modules.get(obj.__module__)
+        filename = source_filename(getattr(module, '__file__', None))
+        if filename is None:
+            return None
+        index = get_index(filename, module.__dict__)
+        if index is None:
+            return None
+        try:
+            return index, index.class_line(obj.__name__), False
+        except IOError:
+            return None
+    if isinstance(obj, types.MethodType):
+        obj = obj.im_func
+    if isinstance(obj, types.FunctionType):
+        code = obj.func_code
+        index = get_index(code.co_filename, obj.func_globals)
+        if index is None:
+            return None
+        return index, index.function_line(code.co_firstlineno), False
+    return None
+
+
+def get_lineno(obj):
+    """Return the line number, counting from 1, where C{obj} is defined.
+
+    @raise IOError: If the source of C{obj} can't be found.
+    """
+    found = findsource(obj)
+    if found is None:
+        raise IOError('could not find source of %r' % (obj,))
+    return found[1] + 1
@@ -0,0 +1,393 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Find tests by parsing source code rather than importing it.
+
+Importing a test module runs all of its code and imports all of its
+dependencies, which is often most of the cost of documenting it. The finder in
+this module reads the source with the C{ast} module instead and describes what
+it finds with the objects in L{testdoc.model}, which the L{Documenter} can use
+in place of real modules, classes and methods.
+
+Only classes defined at the top level of a module are considered. A class is
+a test case if one of its bases is a known C{TestCase}, either directly or
+through other classes that can be found by parsing the modules they are
+defined in.
+"""
+
+import ast
+import collections
+import imp
+import os
+
+from testdoc import reflect, source
+from testdoc.model import Module, Test, TestClass, emit
+
+
+TEST_CASE_NAMES = frozenset([
+    'unittest.TestCase',
+    'unittest.case.TestCase',
+    'testtools.TestCase',
+    'testtools.testcase.TestCase',
+    'twisted.trial.unittest.TestCase',
+    'twisted.trial.unittest.SynchronousTestCase',
+    ])
+
+
+def find_module_file(name, path=None):
+    """Find the source file for the module called C{name}, without importing
+    it or any of the packages it is in.
+
+    @return: A filename, or C{None} if there is no source for C{name}.
+    """
+    filename = None
+    for part in name.split('.'):
+        try:
+            fd, filename, (suffix, mode, kind) = imp.find_module(part, path)
+        except ImportError:
+            return None
+        if fd is not None:
+            fd.close()
+        if kind == imp.PKG_DIRECTORY:
+            path = [filename]
+            filename = os.path.join(filename, '__init__.py')
+        elif kind == imp.PY_SOURCE:
+            path = []
+        else:
+            return None
+    if filename is None or not os.path.isfile(filename):
+        return None
+    return filename
+
+
+class _ParsedModule(object):
+    """The parts of a module's syntax tree that we need to find tests.
+
+    The lines of the source are read again if they are needed after being
+    released.
+    """
+
+    def __init__(self, name, filename, text):
+        self._lines = text.splitlines(True)
+        self._scan(name, filename, ast.parse(text, filename))
+
+    def _scan(self, name, filename, tree):
+        self.name = name
+        self.filename = filename
+        self.tree = tree
+        self._index = None
+        self.imports = {}
+        self.classes = {}
+        self.class_order = []
+        for node in self.tree.body:
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        self.imports[alias.asname] = alias.name
+                    else:
+                        top = alias.name.split('.')[0]
+                        self.imports[top] = top
+            elif isinstance(node, ast.ImportFrom):
+                base = self._absolute(node.module, node.level)
+                for alias in node.names:
+                    local = alias.asname or alias.name
+                    self.imports[local] = '%s.%s' % (base, alias.name)
+            elif isinstance(node, ast.ClassDef):
+                if node.name in self.classes:
+                    self.class_order.remove(node.name)
+                self.classes[node.name] = node
+                self.class_order.append(node.name)
+
+    @property
+    def package(self):
+        if os.path.basename(self.filename).startswith('__init__.'):
+            return self.name
+        return self.name.rpartition('.')[0]
+
+    def _absolute(self, name, level):
+        if not level:
+            return name
+        package = self.package.split('.')
+        if level > 1:
+            package = package[:-(level - 1)]
+        if name:
+            package.append(name)
+        return '.'.join(package)
+
+    def qualify(self, expr):
+        """Return the fully-qualified dotted name of C{expr}, or C{None} if it
+        isn't a simple name.
+        """
+        parts = []
+        while isinstance(expr, ast.Attribute):
+            parts.insert(0, expr.attr)
+            expr = expr.value
+        if not isinstance(expr, ast.Name):
+            return None
+        if expr.id in self.classes:
+            parts.insert(0, '%s.%s' % (self.name, expr.id))
+        else:
+            parts.insert(0, self.imports.get(expr.id, expr.id))
+        return '.'.join(parts)
+
+    def find_docs(self, node, lnum, module=False):
+        """Return the documentation for C{node}, which starts at line index
+        C{lnum}, and where it came from, as L{reflect.find_docs} does.
+        """
+        doc = ast.get_docstring(node, clean=False)
+        if doc is not None:
+            return doc, reflect.DOCSTRING
+        doc = reflect._strip_comments(self.index.comments(lnum, module))
+        if doc is None:
+            doc = reflect._strip_comments(
+                self.index.internal_comments(lnum, module))
+        if doc is None:
+            return None, None
+        return doc, reflect.COMMENTS
+
+    def docs(self, node, lnum, module=False):
+        """Return the documentation for C{node}, which starts at line index
+        C{lnum}, following the same rules as L{reflect.extract_docs}.
+        """
+        return self.find_docs(node, lnum, module)[0]
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            self._lines = source.read_lines(self.filename)
+        return self._lines
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = source.SourceIndex(self.lines)
+        return self._index
+
+    def release(self):
+        """Forget the lines and index of the source, which are read and
+        built again if needed.
+        """
+        self._lines = None
+        self._index = None
+
+
+class StaticFinder(object):
+    """Find tests in source files without importing them.
+
+    Modules parsed to resolve base classes are kept, so that a finder used for
+    many modules only parses each of them once. They are parsed again if
+    their files change. Once the source files of those kept add up to more
+    than C{max_bytes}, the least recently used are forgotten.
+
+    @ivar test_case_names: The fully-qualified names of classes that are
+        test cases.
+    """
+
+    def __init__(self, test_case_names=TEST_CASE_NAMES, path=None,
+                 max_bytes=None):
+        """
+        @param max_bytes: The most source to keep parsed modules for.
+            Defaults to what L{source.set_max_bytes} set for indexes.
+        """
+        self.test_case_names = test_case_names
+        self.path = path
+        self.max_bytes = max_bytes
+        self.size = 0
+        # Module names mapped to parsed modules, or None if they have no
+        # source, most recently used last.
+        self._modules = collections.OrderedDict()
+
+    def _recall(self, name):
+        parsed = self._modules.pop(name)
+        self._modules[name] = parsed
+        return parsed
+
+    def _remember(self, name, parsed):
+        old = self._modules.pop(name, None)
+        if old is not None:
+            self.size -= old.size
+        self._modules[name] = parsed
+        if parsed is not None:
+            self.size += parsed.size
+        max_bytes = self.max_bytes
+        if max_bytes is None:
+            max_bytes = source.get_max_bytes()
+        while self.size > max_bytes and len(self._modules) > 1:
+            oldest, parsed = self._modules.popitem(last=False)
+            if parsed is not None:
+                self.size -= parsed.size
+
+    def parse_file(self, filename, name=None):
+        """Parse the module at C{filename}.
+
+        @param name: The name of the module. If not given, it is worked out
+            from the filename as L{reflect.filenameToModuleName} does.
+        @return: A L{Module}.
+        """
+        filename = reflect._resolveDirectory(filename)
+        if name is None:
+            name = reflect.filenameToModuleName(filename)
+            if os.path.basename(filename).startswith('__init__.'):
+                name = name.rpartition('.')[0]
+        return self._describe(self._load_file(name, filename))
+
+    def parse_name(self, name):
+        """Parse the module called C{name}, finding it on the path.
+
+        @return: A L{Module}.
+        @raise ImportError: If there is no source for C{name}.
+        """
+        parsed = self._load_name(name)
+        if parsed is None:
+            raise ImportError('No source for module %s' % (name,))
+        return self._describe(parsed)
+
+    def find_tests(self, finder, argument):
+        """Send the tests in C{argument} to C{finder}.
+
+        @param argument: A filename or a fully-qualified module name.
+        """
+        if os.path.exists(argument):
+            module = self.parse_file(argument)
+        else:
+            module = self.parse_name(argument)
+        emit(finder, module)
+
+    def _parse(self, name, filename, mtime):
+        """Return a L{_ParsedModule} for the source file C{filename}, last
+        modified at C{mtime}.
+        """
+        return _ParsedModule(name, filename, source.read_source(filename))
+
+    def _load_file(self, name, filename):
+        parsed = None
+        if name in self._modules:
+            parsed = self._recall(name)
+        stat = os.stat(filename)
+        if (parsed is None or parsed.filename != filename
+            or parsed.mtime != stat.st_mtime):
+            parsed = self._parse(name, filename, stat.st_mtime)
+            parsed.mtime = stat.st_mtime
+            parsed.size = stat.st_size
+            self._remember(name, parsed)
+        return parsed
+
+    def _load_name(self, name):
+        if name in self._modules:
+            parsed = self._recall(name)
+            if parsed is None or parsed.mtime == _getmtime(parsed.filename):
+                return parsed
+        filename = find_module_file(name, self.path)
+        if filename is None:
+            self._remember(name, None)
+            return None
+        try:
+            return self._load_file(name, filename)
+        except (IOError, OSError, SyntaxError):
+            self._remember(name, None)
+            return None
+
+    def _resolve(self, qualname, seen):
+        """Find the class called C{qualname}.
+
+        @return: A C{(parsed_module, class_node)} pair, or C{None}.
+        """
+        if qualname is None or qualname in seen:
+            return None
+        seen.add(qualname)
+        module_name, dot, class_name = qualname.rpartition('.')
+        if not dot:
+            return None
+        parsed = self._load_name(module_name)
+        if parsed is None:
+            return None
+        if class_name in parsed.classes:
+            return parsed, parsed.classes[class_name]
+        if class_name in parsed.imports:
+            # Re-exported from somewhere else.
+            return self._resolve(parsed.imports[class_name], seen)
+        return None
+
+    def _bases(self, parsed, node):
+        for base in node.bases:
+            yield parsed.qualify(base)
+
+    def _is_test_case(self, parsed, node, seen):
+        for qualname in self._bases(parsed, node):
+            if qualname in self.test_case_names:
+                return True
+            found = self._resolve(qualname, seen)
+            if found is not None and self._is_test_case(
+                found[0], found[1], seen):
+                return True
+        return False
+
+    def _methods(self, parsed, node, seen):
+        """Return a dict mapping the names of the test methods of a class to
+        C{(parsed_module, function_node)} pairs, including inherited methods.
+        """
+        methods = {}
+        for qualname in reversed(list(self._bases(parsed, node))):
+            found = self._resolve(qualname, seen)
+            if found is not None:
+                methods.update(self._methods(found[0], found[1], seen))
+        for child in node.body:
+            if (isinstance(child, ast.FunctionDef)
+                and child.name.startswith('test') and len(child.name) > 4):
+                methods[child.name] = (parsed, child)
+        return methods
+
+    def _describe(self, parsed):
+        classes = []
+        for name in parsed.class_order:
+            node = parsed.classes[name]
+            if not self._is_test_case(parsed, node, set()):
+                continue
+            tests = []
+            for method_parsed, child in self._methods(
+                parsed, node, set()).values():
+                doc, doc_kind = method_parsed.find_docs(
+                    child, child.lineno - 1)
+                tests.append(Test(
+                    child.name, doc, child.lineno, method_parsed.filename,
+                    doc_kind))
+            tests.sort(key=lambda test: test.lineno)
+            lnum = _class_line(parsed, node)
+            classes.append(TestClass(
+                node.name, parsed.docs(node, lnum), parsed.name, lnum + 1,
+                tests))
+        classes.sort(key=lambda testCaseClass: testCaseClass.lineno)
+        module = Module(
+            parsed.name, parsed.docs(parsed.tree, 0, module=True),
+            parsed.filename, classes)
+        # Only the syntax tree is needed to resolve base classes later, so
+        # don't keep the lines or the index.
+        parsed.release()
+        return module
+
+
+def _getmtime(filename):
+    try:
+        return os.path.getmtime(filename)
+    except OSError:
+        return None
+
+
+def _class_line(parsed, node):
+    """Return the index of the 'class' line of C{node}, skipping past any
+    decorators.
+    """
+    lnum = node.lineno - 1
+    if not node.decorator_list:
+        return lnum
+    lines = parsed.lines
+    while lnum < len(lines) - 1 and not lines[lnum].lstrip().startswith(
+        'class'):
+        lnum += 1
+    return lnum
+
+
+def find_tests(finder, argument):
+    """Send the tests in C{argument}, a filename or module name, to C{finder}
+    without importing it.
+    """
+    StaticFinder().find_tests(finder, argument)
@@ -0,0 +1,100 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Count how many tests are documented, without writing any documentation.
+
+A L{Counter} is a finder that only asks where the documentation of each test
+comes from: a docstring, comments alone, or nowhere. Nothing is formatted, so
+with the static or bytecode backends checking that a large suite is
+documented costs little more than finding its tests.
+"""
+
+from testdoc.model import get_docs
+from testdoc.reflect import COMMENTS, DOCSTRING
+
+
+class Counts(object):
+    """The numbers of tests documented by docstrings, by comments alone, and
+    not at all.
+    """
+
+    def __init__(self):
+        self.docstrings = 0
+        self.comments = 0
+        self.undocumented = 0
+
+    @property
+    def total(self):
+        return self.docstrings + self.comments + self.undocumented
+
+    @property
+    def documented(self):
+        return self.docstrings + self.comments
+
+    def percent(self):
+        """Return the percentage of tests that are documented, which is 100
+        if there are none.
+        """
+        if not self.total:
+            return 100.0
+        return 100.0 * self.documented / self.total
+
+    def count(self, doc_kind):
+        """Count a test whose documentation came from C{doc_kind}, as
+        returned by L{testdoc.reflect.find_docs}.
+        """
+        if doc_kind == DOCSTRING:
+            self.docstrings += 1
+        elif doc_kind == COMMENTS:
+            self.comments += 1
+        else:
+            self.undocumented += 1
+
+
+class Counter(object):
+    """A finder that counts how the tests it is given are documented.
+
+    @ivar total: The L{Counts} of all the tests.
+    @ivar modules: A list of C{(name, counts, classes)} for each module, in
+        the order found, where C{classes} is a list of C{(name, counts)} for
+        each of its test classes.
+    """
+
+    def __init__(self):
+        self.total = Counts()
+        self.modules = []
+        self._module = None
+        self._class = None
+
+    def got_module(self, module):
+        self._module = (module.__name__, Counts(), [])
+        self.modules.append(self._module)
+
+    def got_test_class(self, klass):
+        self._class = (klass.__name__, Counts())
+        self._module[2].append(self._class)
+
+    def got_test(self, method):
+        doc, doc_kind = get_docs(method)
+        self.total.count(doc_kind)
+        self._module[1].count(doc_kind)
+        self._class[1].count(doc_kind)
+
+    def report(self, stream):
+        """Write a table of the counts of each module, each of its classes,
+        and all of them to C{stream}.
+        """
+        rows = []
+        for name, counts, classes in self.modules:
+            rows.append((name, counts))
+            for class_name, class_counts in classes:
+                rows.append(('  ' + class_name, class_counts))
+        rows.append(('TOTAL', self.total))
+        width = max([len(name) for name, counts in rows])
+        line = '%-*s  %10s  %8s  %12s  %10s\n'
+        stream.write(line % (
+            width, 'Name', 'Docstrings', 'Comments', 'Undocumented',
+            'Documented'))
+        for name, counts in rows:
+            stream.write(line % (
+                width, name, counts.docstrings, counts.comments,
+                counts.undocumented, '%.1f%%' % (counts.percent(),)))
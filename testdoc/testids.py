@@ -0,0 +1,164 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Document only the tests in a list of test ids.
+
+Test runners can list the tests they know about, or ran, by id: the module,
+class and method names joined by dots, as in C{foo.test_bar.BarTest.test_baz}.
+Given such a list, L{Selection} works out which modules to document, and
+wraps finders so that only the listed classes and tests in them are
+documented, in the order they appear in their source.
+
+Lists can be one id per line, as from C{testr list-tests}, or subunit
+streams. Version 1 streams are text, and their C{test:} lines are used;
+version 2 streams are binary, and need python-subunit to read.
+"""
+
+import re
+
+
+SUBUNIT_V2_SIGNATURE = '\xb3'
+
+# Ids with scenarios applied, as by testscenarios, end in the scenario name.
+_scenarioRE = re.compile(r'\(.*\)$')
+
+
+def _subunit_v2_ids(stream):
+    try:
+        import subunit
+        from testtools import StreamResult
+    except ImportError:
+        raise ValueError("reading subunit v2 streams needs python-subunit")
+    ids = []
+
+    class IdCollector(StreamResult):
+        def status(self, test_id=None, **kwargs):
+            if test_id is not None:
+                ids.append(test_id)
+    subunit.ByteStreamToStreamResult(stream).run(IdCollector())
+    return ids
+
+
+def read_ids(stream):
+    """Read test ids from C{stream}, one at a time.
+
+    @return: An iterator of test ids. An id may appear more than once.
+    @raise ValueError: If C{stream} is a subunit v2 stream and python-subunit
+        isn't installed.
+    """
+    first = stream.readline()
+    if first.startswith(SUBUNIT_V2_SIGNATURE):
+        return iter(_subunit_v2_ids(_Prepended(first, stream)))
+    return _text_ids(first, stream)
+
+
+def _text_ids(first, stream):
+    for lines in [[first], stream]:
+        for line in lines:
+            words = line.split()
+            if not words or words[0].startswith('#'):
+                continue
+            if words[0] == 'test:' and len(words) > 1:
+                yield words[1]
+            elif not words[0].endswith(':'):
+                # Other subunit v1 lines, like 'success: ...', are skipped.
+                yield words[0]
+
+
+class _Prepended(object):
+    """A stream that reads C{first}, then the rest of C{stream}."""
+
+    def __init__(self, first, stream):
+        self._first = first
+        self._stream = stream
+
+    def read(self, size=-1):
+        if not self._first:
+            return self._stream.read(size)
+        if size < 0:
+            data, self._first = self._first, ''
+            return data + self._stream.read()
+        data, self._first = self._first[:size], self._first[size:]
+        return data
+
+
+def split_id(test_id):
+    """Split C{test_id} into its module, class and method names.
+
+    @raise ValueError: If it doesn't have all three.
+    """
+    parts = _scenarioRE.sub('', test_id).rsplit('.', 2)
+    if len(parts) != 3:
+        raise ValueError('%r is not a test id' % (test_id,))
+    return tuple(parts)
+
+
+class Selection(object):
+    """The tests to document in each module.
+
+    @ivar modules: The names of the modules, in the order they were first
+        listed.
+    @ivar tests: A dict mapping module names to dicts mapping class names to
+        the sets of method names listed in them.
+    """
+
+    def __init__(self):
+        self.modules = []
+        self.tests = {}
+
+    def add(self, test_id):
+        """Add the test C{test_id} to the selection."""
+        module, klass, method = split_id(test_id)
+        if module not in self.tests:
+            self.modules.append(module)
+            self.tests[module] = {}
+        self.tests[module].setdefault(klass, set()).add(method)
+
+    @classmethod
+    def from_ids(cls, ids):
+        """Make a selection of the tests in C{ids}."""
+        selection = cls()
+        for test_id in ids:
+            selection.add(test_id)
+        return selection
+
+    def finder(self, finder):
+        """Return a finder that only sends C{finder} the selected classes and
+        tests.
+        """
+        return SelectingFinder(finder, self.tests)
+
+    def wrap(self, find_tests):
+        """Return a C{find_tests} callable like C{find_tests}, which only
+        finds the selected classes and tests.
+        """
+        def find_selected_tests(finder, *args):
+            find_tests(self.finder(finder), *args)
+        return find_selected_tests
+
+
+class SelectingFinder(object):
+    """A finder that only passes on the selected classes and tests.
+
+    Modules are always passed on. Classes and tests in modules that aren't
+    selected at all are not.
+    """
+
+    def __init__(self, finder, tests):
+        self.finder = finder
+        self.tests = tests
+        self._classes = {}
+        self._methods = None
+
+    def got_module(self, module):
+        self._classes = self.tests.get(module.__name__, {})
+        self._methods = None
+        self.finder.got_module(module)
+
+    def got_test_class(self, klass):
+        self._methods = self._classes.get(klass.__name__)
+        if self._methods is not None:
+            self.finder.got_test_class(klass)
+
+    def got_test(self, method):
+        if self._methods is not None and method.__name__ in self._methods:
+            self.finder.got_test(method)
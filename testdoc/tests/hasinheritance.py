@@ -0,0 +1,34 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import unittest
+
+from testdoc.tests import hastests
+
+
+class Mixin(object):
+    def test_from_mixin(self):
+        pass
+
+
+class BaseTest(unittest.TestCase):
+    # A base class with a comment.
+
+    def test_inherited(self):
+        # This test is inherited by a subclass.
+        pass
+
+
+class SubTest(BaseTest):
+    def test_own(self):
+        pass
+
+
+# Preceded by a comment.
+class ImportedBaseTest(hastests.AnotherTest):
+    def test_extra(self):
+        pass
+
+
+class NotATest(Mixin):
+    def test_ignored(self):
+        pass
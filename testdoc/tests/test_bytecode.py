@@ -0,0 +1,103 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import os
+import py_compile
+import shutil
+import tempfile
+import unittest
+
+from testdoc import bytecode, model, static
+
+
+SOURCE = '''\
+"""A compiled test module."""
+
+import unittest
+from unittest import TestCase as Base
+
+
+class NotATest(object):
+    def test_nothing(self):
+        pass
+
+
+class FooTest(unittest.TestCase):
+    """Tests for foo."""
+
+    def test_documented(self):
+        """Has a docstring."""
+
+    # Has a comment.
+    def test_commented(self):
+        pass
+
+    def helper(self):
+        pass
+
+
+def decorate(cls):
+    return cls
+
+
+@decorate
+class BarTest(Base):
+
+    @staticmethod
+    def test_decorated():
+        """Has a decorator."""
+'''
+
+
+def describe(module):
+    return (module.__name__, module.__doc__, [
+        (testCaseClass.__name__, testCaseClass.__doc__, testCaseClass.lineno,
+         [(test.__name__, test.__doc__, test.lineno)
+          for test in testCaseClass.tests])
+        for testCaseClass in module.classes])
+
+
+class TestBytecodeFinder(unittest.TestCase):
+    """The bytecode finder should find the same tests and documentation in
+    compiled modules as the static finder does in their source.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.filename = os.path.join(self.directory, 'compiled_tests.py')
+        stream = open(self.filename, 'w')
+        stream.write(SOURCE)
+        stream.close()
+
+    def find(self):
+        finder = bytecode.BytecodeFinder(path=[self.directory])
+        module = model.record(finder.find_tests, 'compiled_tests')
+        return finder, module
+
+    def test_same_as_static(self):
+        py_compile.compile(self.filename)
+        finder, module = self.find()
+        self.assertEqual((finder.compiled, finder.parsed), (1, 0))
+        expected = model.record(
+            static.StaticFinder(path=[self.directory]).find_tests,
+            'compiled_tests')
+        self.assertEqual(describe(module), describe(expected))
+        self.assertEqual(
+            [(testCaseClass.__name__,
+              [test.__name__ for test in testCaseClass.tests])
+             for testCaseClass in module.classes],
+            [('FooTest', ['test_documented', 'test_commented']),
+             ('BarTest', ['test_decorated'])])
+
+    def test_stale(self):
+        """A compiled file older than its source is ignored."""
+        py_compile.compile(self.filename)
+        mtime = os.path.getmtime(self.filename)
+        os.utime(self.filename, (mtime + 10, mtime + 10))
+        finder, module = self.find()
+        self.assertEqual((finder.compiled, finder.parsed), (0, 1))
+        self.assertEqual(len(module.classes), 2)
+
+    def test_not_compiled(self):
+        finder, module = self.find()
+        self.assertEqual((finder.compiled, finder.parsed), (0, 1))
@@ -0,0 +1,106 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from testdoc import cache, model
+from testdoc.tests.test_static import DocsCollector
+
+
+class FakeFindTests(object):
+    """Find the same tests every time, counting the calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, finder, argument):
+        self.calls.append(argument)
+        module = model.Module(argument, 'docs', None, [
+            model.TestClass('FooTest', None, argument, 3, [
+                model.Test('test_foo', 'foo', 4)])])
+        model.emit(finder, module)
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.module = os.path.join(self.directory, 'test_foo.py')
+        self.write_module('# version 1\n')
+        self.cache = cache.Cache(
+            os.path.join(self.directory, 'cache'), 'import')
+
+    def write_module(self, text):
+        stream = open(self.module, 'w')
+        stream.write(text)
+        stream.close()
+
+    def test_miss_then_hit(self):
+        """The first time a module is found, it is stored in the cache, and
+        the second time it comes from there.
+        """
+        find_tests = FakeFindTests()
+        cached = self.cache.wrap(find_tests)
+        first, second = DocsCollector(), DocsCollector()
+        cached(first, self.module)
+        cached(second, self.module)
+        self.assertEqual(first.log, second.log)
+        self.assertEqual([self.module], find_tests.calls)
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+
+    def test_changed_source(self):
+        """Changing the source of a module invalidates its entry."""
+        find_tests = FakeFindTests()
+        cached = self.cache.wrap(find_tests)
+        cached(DocsCollector(), self.module)
+        self.write_module('# version 2\n')
+        cached(DocsCollector(), self.module)
+        self.assertEqual([self.module, self.module], find_tests.calls)
+
+    def test_backend_in_key(self):
+        other = cache.Cache(self.cache.directory, 'static')
+        self.assertNotEqual(
+            self.cache.key(self.module), other.key(self.module))
+
+    def test_no_source(self):
+        """Modules without source are never cached."""
+        self.assertEqual(None, self.cache.key('testdoc.tests.doesnotexist'))
+        find_tests = FakeFindTests()
+        cached = self.cache.wrap(find_tests)
+        cached(DocsCollector(), 'testdoc.tests.doesnotexist')
+        cached(DocsCollector(), 'testdoc.tests.doesnotexist')
+        self.assertEqual(2, len(find_tests.calls))
+        self.assertEqual(2, self.cache.misses)
+
+    def test_bad_entry(self):
+        """An entry that can't be loaded is a miss, and is removed."""
+        find_tests = FakeFindTests()
+        cached = self.cache.wrap(find_tests)
+        path = self.cache._path(self.cache.key(self.module))
+        for data in ['', 'garbage', 'cnosuchmodule\nThing\n.']:
+            stream = open(path, 'wb')
+            stream.write(data)
+            stream.close()
+            self.assertEqual(None, self.cache.get(self.module))
+            self.assertFalse(os.path.exists(path))
+        cached(DocsCollector(), self.module)
+        self.assertEqual([self.module], find_tests.calls)
+        self.assertEqual(4, self.cache.misses)
+
+    def test_evict(self):
+        """Entries are evicted, least recently used first, when the cache is
+        bigger than its maximum size.
+        """
+        self.cache.put(self.module, model.Module('old', None, None, []))
+        old = os.listdir(self.cache.directory)
+        os.utime(os.path.join(self.cache.directory, old[0]), (0, 0))
+        self.write_module('# version 2\n')
+        self.cache.put(self.module, model.Module('new', None, None, []))
+        size = os.path.getsize(os.path.join(self.cache.directory, old[0]))
+        self.cache.max_size = size
+        self.cache.evict()
+        self.assertEqual('new', self.cache.get(self.module).__name__)
+        self.assertFalse(old[0] in os.listdir(self.cache.directory))
@@ -0,0 +1,75 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from testdoc import discovery
+
+
+class TestWalk(unittest.TestCase):
+    """Test modules are found by walking directories, looking only at
+    filenames.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def make_file(self, *segments):
+        path = os.path.join(self.directory, *segments)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        open(path, 'w').close()
+        return path
+
+    def test_pattern(self):
+        expected = [self.make_file('test_a.py'), self.make_file('test_b.py')]
+        self.make_file('helpers.py')
+        self.make_file('test_c.txt')
+        self.assertEqual(expected, list(discovery.walk(self.directory)))
+
+    def test_packages_only(self):
+        """Only sub-directories that are packages are searched, since modules
+        in other directories can't be imported. A directory's own modules
+        come before those of its packages.
+        """
+        self.make_file('pkg', '__init__.py')
+        expected = [self.make_file('test_b.py'),
+                    self.make_file('pkg', 'test_a.py')]
+        self.make_file('data', 'test_c.py')
+        self.assertEqual(expected, list(discovery.walk(self.directory)))
+
+    def test_custom_pattern(self):
+        expected = [self.make_file('a_tests.py')]
+        self.make_file('test_a.py')
+        self.assertEqual(
+            expected, list(discovery.walk(self.directory, '*_tests.py')))
+
+
+class TestExpand(unittest.TestCase):
+
+    def test_package_name(self):
+        """A package given by name is expanded into the names of its test
+        modules.
+        """
+        names = list(discovery.expand(['testdoc.tests'], 'has*.py'))
+        self.assertEqual(
+            ['testdoc.tests.hasemptycase', 'testdoc.tests.hasinheritance',
+             'testdoc.tests.hastests'], names)
+
+    def test_module_name(self):
+        self.assertEqual(
+            ['testdoc.tests.hastests'],
+            list(discovery.expand(['testdoc.tests.hastests'])))
+
+    def test_filename(self):
+        from testdoc.tests import hastests
+        filename = os.path.splitext(hastests.__file__)[0] + '.py'
+        self.assertEqual([filename], list(discovery.expand([filename])))
+
+    def test_lazy(self):
+        """Arguments are only expanded as they are needed."""
+        expanded = discovery.expand(['testdoc.tests.hastests', None])
+        self.assertEqual('testdoc.tests.hastests', expanded.next())
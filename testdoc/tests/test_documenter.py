@@ -2,7 +2,8 @@
 
 import unittest
 
-from testdoc.documenter import Documenter, split_name, title_case
+from testdoc.documenter import (
+    Documenter, Humaniser, LRUCache, split_name, title_case)
 from testdoc.reflect import extract_docs
 
 
@@ -128,3 +129,62 @@ class TestDocumenter(unittest.TestCase):
         """
         self.assertEqual('Janey has a Gun',
                          self.documenter.format_test('test_janey_has_a_gun'))
+
+
+class TestHumaniser(unittest.TestCase):
+    """The humaniser caches titles, but gives the same titles as the
+    uncached functions.
+    """
+
+    def setUp(self):
+        self.humaniser = Humaniser(maxsize=2)
+
+    def test_same_as_uncached(self):
+        for name in ['test_janey_has_a_gun', 'test_splitDNSName',
+                     'test300Name', 'test_splitName_works']:
+            expected = title_case(split_name(name)[1:]).lstrip()
+            self.assertEqual(expected, self.humaniser.format_test(name))
+            self.assertEqual(expected, self.humaniser.format_test(name))
+        self.assertEqual(
+            'Foo Bar', self.humaniser.format_test_class('TestFooBar'))
+
+    def test_format_tests(self):
+        """A class's methods can be titled in one call, with the same
+        titles as one at a time.
+        """
+        names = ['test_janey_has_a_gun', 'test_foo', 'test_janey_has_a_gun']
+        self.assertEqual(
+            ['Janey has a Gun', 'Foo', 'Janey has a Gun'],
+            self.humaniser.format_tests(names))
+        self.assertEqual(
+            [self.humaniser.format_test(name) for name in names],
+            self.humaniser.format_tests(names))
+
+    def test_format_test_classes(self):
+        self.assertEqual(
+            ['Foo Bar', 'HTTP Client'],
+            self.humaniser.format_test_classes(
+                ['TestFooBar', 'HTTPClientTest']))
+
+    def test_documenter(self):
+        documenter = Documenter(MockFormatter(), self.humaniser)
+        self.assertEqual(
+            ['Foo Bar', 'Baz'],
+            documenter.format_tests(['test_fooBar', 'test_baz']))
+        self.assertEqual('Foo Bar', documenter.format_test('test_fooBar'))
+        self.assertEqual(
+            ['Foo Bar'], documenter.format_test_classes(['TestFooBar']))
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache['a'] = 1
+        cache['b'] = 2
+        cache['a']
+        cache['c'] = 3
+        self.assertEqual(2, len(cache))
+        self.assertTrue('a' in cache)
+        self.assertFalse('b' in cache)
+        self.assertRaises(KeyError, cache.__getitem__, 'b')
@@ -1,9 +1,13 @@
 # Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
 
 import StringIO
+import json
 import unittest
 
-from testdoc.formatter import WikiFormatter
+from testdoc.documenter import Documenter
+from testdoc.finder import find_tests
+from testdoc.formatter import (
+    HTMLFormatter, JSONLinesFormatter, WikiFormatter)
 
 
 class WikiFormatterTest(unittest.TestCase):
@@ -26,3 +30,55 @@ class WikiFormatterTest(unittest.TestCase):
     def test_paragraph(self):
         self.formatter.paragraph('\nfoo\nbar\n')
         self.assertEqual(self.stream.getvalue(), 'foo\nbar\n\n')
+
+
+class JSONLinesFormatterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = StringIO.StringIO()
+        self.formatter = JSONLinesFormatter(self.stream)
+
+    def records(self):
+        return [json.loads(line)
+                for line in self.stream.getvalue().splitlines()]
+
+    def test_entry(self):
+        self.formatter.entry(
+            'test', 'test_foo', 'Foo', 'Does foo.', 'foo.py', 3)
+        self.assertEqual(
+            [{'kind': 'test', 'name': 'test_foo', 'title': 'Foo',
+              'docs': 'Does foo.', 'file': 'foo.py', 'line': 3}],
+            self.records())
+
+    def test_not_utf8(self):
+        self.formatter.entry('module', 'foo', 'foo', '\xff', None, None)
+        self.assertEqual(u'\ufffd', self.records()[0]['docs'])
+
+    def test_documenter(self):
+        from testdoc.tests import hastests
+        find_tests(Documenter(self.formatter), hastests)
+        records = self.records()
+        self.assertEqual(
+            ['module', 'class', 'test', 'test', 'class', 'test'],
+            [record['kind'] for record in records])
+        some, foo = records[1:3]
+        self.assertEqual(('SomeTest', 'Some'), (some['name'], some['title']))
+        self.assertEqual(
+            ('test_foo_handles_qux', 'Foo Handles Qux'),
+            (foo['name'], foo['title']))
+        self.assertEqual(hastests.__file__.rstrip('co'), foo['file'])
+        self.assertEqual(
+            hastests.SomeTest.test_foo_handles_qux.im_func.func_code
+            .co_firstlineno, foo['line'])
+
+
+class HTMLFormatterTest(unittest.TestCase):
+
+    def test_escapes(self):
+        stream = StringIO.StringIO()
+        formatter = HTMLFormatter(stream)
+        formatter.title('a<b')
+        formatter.paragraph('\nfoo &\nbar\n\n  baz\n')
+        self.assertEqual(
+            '<h1>a&lt;b</h1>\n<p>foo &amp;\nbar</p>\n<p>baz</p>\n',
+            stream.getvalue())
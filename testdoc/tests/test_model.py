@@ -0,0 +1,41 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import pickle
+import unittest
+
+from testdoc import model
+from testdoc.finder import find_tests
+from testdoc.tests.test_static import DocsCollector
+
+
+class TestRecorder(unittest.TestCase):
+    """Recording the tests in a module gives a description that can be
+    replayed later, in another process, with the same results.
+    """
+
+    def test_replay(self):
+        from testdoc.tests import hasinheritance
+        expected = DocsCollector()
+        find_tests(expected, hasinheritance)
+        module = model.record(find_tests, hasinheritance)
+        observed = DocsCollector()
+        model.emit(observed, module)
+        self.assertEqual(expected.log, observed.log)
+
+    def test_pickle(self):
+        from testdoc.tests import hastests
+        module = pickle.loads(
+            pickle.dumps(model.record(find_tests, hastests), 2))
+        observed = DocsCollector()
+        model.emit(observed, module)
+        expected = DocsCollector()
+        find_tests(expected, hastests)
+        self.assertEqual(expected.log, observed.log)
+
+    def test_line_numbers(self):
+        from testdoc.tests import hastests
+        module = model.record(find_tests, hastests)
+        self.assertEqual(
+            [7, 17], [klass.lineno for klass in module.classes])
+        self.assertEqual(
+            [10, 13], [test.lineno for test in module.classes[0].tests])
@@ -0,0 +1,49 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import os
+import unittest
+
+from testdoc import parallel, reflect
+from testdoc.finder import find_tests
+
+
+def find_tests_by_name(finder, name):
+    if name == 'crash':
+        os._exit(3)
+    find_tests(finder, reflect.namedAny(name))
+
+
+class TestFindAll(unittest.TestCase):
+
+    def test_ordered(self):
+        """Results come back in the order the modules were given."""
+        names = ['testdoc.tests.hastests', 'testdoc.tests.empty',
+                 'testdoc.tests.hasemptycase', 'testdoc.tests.hasinheritance']
+        results = list(parallel.find_all(find_tests_by_name, names, 2))
+        self.assertEqual(names, [argument for argument, m, e in results])
+        self.assertEqual(
+            names, [module.__name__ for argument, module, e in results])
+        self.assertEqual([None] * 4, [error for a, m, error in results])
+
+    def test_error(self):
+        """A module that can't be documented is reported on its own, and the
+        others are still documented.
+        """
+        names = ['testdoc.tests.doesnotexist', 'testdoc.tests.hastests']
+        results = list(parallel.find_all(find_tests_by_name, names, 2))
+        argument, module, error = results[0]
+        self.assertEqual(None, module)
+        self.assertTrue('doesnotexist' in error, error)
+        self.assertEqual('testdoc.tests.hastests', results[1][1].__name__)
+
+    def test_crash(self):
+        """A worker that dies is reported against its module alone, rather
+        than the others waiting for it forever.
+        """
+        names = ['testdoc.tests.hastests', 'crash', 'testdoc.tests.empty']
+        results = list(parallel.find_all(find_tests_by_name, names, 2))
+        self.assertEqual(
+            [None, 'Worker exited with code 3.\n', None],
+            [error for a, m, error in results])
+        self.assertEqual(
+            'testdoc.tests.empty', results[2][1].__name__)
@@ -0,0 +1,72 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from testdoc import prefetch, source
+
+
+class TestPrefetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.filenames = []
+        for name in ['a', 'b', 'c']:
+            filename = os.path.join(self.directory, name + '.py')
+            stream = open(filename, 'w')
+            stream.write('# %s\n' % (name,))
+            stream.close()
+            self.filenames.append(filename)
+        self.prefetcher = prefetch.Prefetcher(threads=1)
+        self.addCleanup(self.prefetcher.close)
+
+    def wait_for(self, count):
+        deadline = time.time() + 5
+        while len(self.prefetcher._texts) < count:
+            self.assertTrue(time.time() < deadline)
+            time.sleep(0.01)
+
+    def test_taken_once(self):
+        self.prefetcher.fetch(self.filenames)
+        self.wait_for(3)
+        self.assertEqual(self.prefetcher.take(self.filenames[0]), '# a\n')
+        self.assertEqual(self.prefetcher.take(self.filenames[0]), None)
+        self.assertEqual(
+            (self.prefetcher.hits, self.prefetcher.misses), (1, 1))
+
+    def test_earlier_dropped(self):
+        """Taking a source drops those read before it, which the
+        documenting loop has gone past.
+        """
+        self.prefetcher.fetch(self.filenames)
+        self.wait_for(3)
+        last = self.filenames[-1]
+        self.assertEqual(self.prefetcher.take(last), '# c\n')
+        self.assertEqual(self.prefetcher.size, 0)
+        self.assertEqual(self.prefetcher.take(self.filenames[0]), None)
+
+    def test_read_source(self):
+        self.prefetcher.fetch(self.filenames[:1])
+        self.wait_for(1)
+        source.set_prefetcher(self.prefetcher)
+        self.addCleanup(source.set_prefetcher, None)
+        os.unlink(self.filenames[0])
+        self.assertEqual(source.read_lines(self.filenames[0]), ['# a\n'])
+        self.assertEqual(source.read_lines(self.filenames[0]), [])
+
+    def test_relative(self):
+        """A source fetched by one name is taken by another for the same
+        file, as when a module's C{__file__} starts with './'.
+        """
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.directory)
+        self.prefetcher.fetch(['a.py'])
+        self.wait_for(1)
+        self.assertEqual(
+            self.prefetcher.take(os.path.join(os.curdir, 'a.py')), '# a\n')
+        self.assertEqual(
+            (self.prefetcher.hits, self.prefetcher.misses), (1, 0))
@@ -1,8 +1,13 @@
 # Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
 
+import os
+import shutil
+import sys
+import tempfile
 import unittest
 
-from testdoc.reflect import extract_docs
+from testdoc import reflect
+from testdoc.reflect import extract_docs, getTestMethods
 
 
 class TestExtractDocs(unittest.TestCase):
@@ -82,3 +87,166 @@ class TestExtractDocs(unittest.TestCase):
             pass
 
         self.assertEqual('external', extract_docs(commented))
+
+
+class TestGetTestMethods(unittest.TestCase):
+    """Test methods are looked up once per class and shared with subclasses,
+    but still resolved the way attribute lookup would resolve them.
+    """
+
+    def names(self, klass):
+        return sorted(
+            function.__name__ for function in getTestMethods(klass))
+
+    def test_own_methods(self):
+        class Foo(object):
+            def test_foo(self):
+                pass
+
+            def helper(self):
+                pass
+
+            def test(self):
+                pass
+        self.assertEqual(['test_foo'], self.names(Foo))
+
+    def test_inherited(self):
+        class Base(object):
+            def test_base(self):
+                pass
+
+        class Sub(Base):
+            def test_sub(self):
+                pass
+        self.assertEqual(['test_base', 'test_sub'], self.names(Sub))
+
+    def test_override(self):
+        """The method found is the one attribute lookup would find."""
+        class Base(object):
+            def test_foo(self):
+                pass
+
+        class Sub(Base):
+            def test_foo(self):
+                pass
+        [method] = getTestMethods(Sub)
+        self.assertTrue(method is Sub.__dict__['test_foo'])
+
+    def test_disabled(self):
+        """A test can be disabled by overriding it with something that isn't
+        a function.
+        """
+        class Base(object):
+            def test_foo(self):
+                pass
+
+        class Sub(Base):
+            test_foo = None
+        self.assertEqual([], self.names(Sub))
+
+    def test_diamond(self):
+        """Multiple inheritance follows the method resolution order."""
+        class Root(object):
+            def test_foo(self):
+                pass
+
+        class Left(Root):
+            pass
+
+        class Right(Root):
+            def test_foo(self):
+                pass
+
+        class Bottom(Left, Right):
+            pass
+        [method] = getTestMethods(Bottom)
+        self.assertTrue(method is Right.__dict__['test_foo'])
+
+    def test_classic(self):
+        class Left:
+            pass
+
+        class Right:
+            def test_foo(self):
+                pass
+
+        class Bottom(Left, Right):
+            pass
+        self.assertEqual(['test_foo'], self.names(Bottom))
+
+
+class TestResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        sys.path.insert(0, self.directory)
+        self.addCleanup(sys.path.remove, self.directory)
+        os.mkdir(os.path.join(self.directory, 'resolverpkg'))
+        self.write('resolverpkg/__init__.py', '')
+        self.write('resolverpkg/good.py', 'class Foo:\n    bar = 1\n')
+        self.write('resolverpkg/bad.py', 'import doesnotexist\n')
+        for name in ['resolverpkg', 'resolverpkg.good', 'resolverpkg.bad']:
+            self.addCleanup(sys.modules.pop, name, None)
+
+    def write(self, name, text):
+        stream = open(os.path.join(self.directory, name), 'w')
+        stream.write(text)
+        stream.close()
+
+    def test_named_any(self):
+        resolver = reflect.Resolver()
+        self.assertEqual(1, resolver.namedAny('resolverpkg.good.Foo.bar'))
+        self.assertEqual(
+            'resolverpkg.good', resolver.namedAny('resolverpkg.good').__name__)
+
+    def test_not_found(self):
+        self.assertRaises(
+            reflect.ModuleNotFound, reflect.namedAny, 'doesnotexist.foo')
+        self.assertRaises(
+            AttributeError, reflect.namedAny, 'resolverpkg.doesnotexist')
+
+    def test_error_in_module(self):
+        """An ImportError raised by the module being imported is passed on,
+        rather than being taken to mean there is no such module.
+        """
+        try:
+            reflect.namedAny('resolverpkg.bad.Foo')
+        except ImportError, e:
+            self.assertTrue('doesnotexist' in str(e))
+        else:
+            self.fail('ImportError not raised')
+        self.assertFalse('resolverpkg.bad' in sys.modules)
+
+    def test_remembers_missing(self):
+        """Once a prefix of a name is found not to be a module, it isn't
+        imported again.
+        """
+        resolver = reflect.Resolver()
+        resolver.namedAny('resolverpkg.good.Foo')
+        self.assertEqual(
+            ['resolverpkg.good.Foo'], sorted(resolver._missing))
+        self.assertEqual(1, resolver.namedAny('resolverpkg.good.Foo.bar'))
+        resolver.clear()
+        self.assertEqual(set(), resolver._missing)
+
+    def test_resolve_many(self):
+        self.assertEqual(
+            [1, 1], reflect.resolve_many(
+                ['resolverpkg.good.Foo.bar', 'resolverpkg.good.Foo.bar']))
+
+    def test_filename_to_module_name(self):
+        resolver = reflect.Resolver()
+        filename = os.path.join(self.directory, 'resolverpkg', 'good.py')
+        self.assertEqual(
+            'resolverpkg.good', resolver.filenameToModuleName(filename))
+        self.assertEqual(
+            'resolverpkg', resolver.filenameToModuleName(
+                os.path.join(self.directory, 'resolverpkg') + os.sep))
+        self.assertEqual(
+            'testdoc.tests.hastests',
+            reflect.filenameToModuleName(
+                os.path.join(os.path.dirname(__file__), 'hastests.py')))
+        self.assertEqual(
+            'resolverpkg.good',
+            resolver.filenameToModule(filename).__name__)
@@ -0,0 +1,76 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import os
+import time
+import unittest
+
+from testdoc import reflect, sandbox
+from testdoc.finder import find_tests
+from testdoc.tests.test_static import DocsCollector
+
+
+def find_tests_by_name(finder, name):
+    if name == 'hang':
+        time.sleep(60)
+    elif name == 'crash':
+        os._exit(3)
+    elif name == 'pid':
+        raise ValueError(os.getpid())
+    find_tests(finder, reflect.namedAny(name))
+
+
+class TestSandbox(unittest.TestCase):
+
+    def make_sandbox(self, **kwargs):
+        workers = sandbox.Sandbox(find_tests_by_name, **kwargs)
+        self.addCleanup(workers.close)
+        return workers
+
+    def test_ordered(self):
+        names = ['testdoc.tests.hastests', 'testdoc.tests.empty',
+                 'testdoc.tests.hasemptycase', 'testdoc.tests.hasinheritance']
+        results = list(self.make_sandbox(jobs=2).find_all(names))
+        self.assertEqual(
+            names, [module.__name__ for argument, module, e in results])
+        self.assertEqual([None] * 4, [error for a, m, error in results])
+
+    def test_timeout(self):
+        """A module that takes too long is reported, and the others are
+        still documented.
+        """
+        workers = self.make_sandbox(timeout=0.5)
+        results = list(workers.find_all(['hang', 'testdoc.tests.hastests']))
+        self.assertEqual(None, results[0][1])
+        self.assertEqual('Timed out after 0.5 seconds.\n', results[0][2])
+        self.assertEqual('testdoc.tests.hastests', results[1][1].__name__)
+
+    def test_crash(self):
+        results = list(self.make_sandbox().find_all(
+            ['crash', 'testdoc.tests.hastests']))
+        self.assertEqual(
+            ('crash', None, 'Worker exited with code 3.\n'), results[0])
+        self.assertEqual('testdoc.tests.hastests', results[1][1].__name__)
+
+    def test_error(self):
+        results = list(self.make_sandbox().find_all(
+            ['testdoc.tests.doesnotexist']))
+        self.assertEqual(None, results[0][1])
+        self.assertTrue('AttributeError' in results[0][2])
+
+    def test_recycle(self):
+        """Workers are replaced after documenting max_modules modules."""
+        workers = self.make_sandbox(max_modules=2)
+        pids = [error.splitlines()[-1] for argument, module, error
+                in workers.find_all(['pid'] * 4)]
+        self.assertEqual(pids[0], pids[1])
+        self.assertNotEqual(pids[1], pids[2])
+        self.assertEqual(pids[2], pids[3])
+
+    def test_find_tests(self):
+        collector = DocsCollector()
+        workers = self.make_sandbox()
+        workers.find_tests(collector, 'testdoc.tests.hastests')
+        self.assertEqual(
+            ('module', 'testdoc.tests.hastests'), collector.log[0][:2])
+        self.assertRaises(
+            sandbox.SandboxError, workers.find_tests, collector, 'crash')
@@ -0,0 +1,92 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from testdoc import search
+from testdoc.documenter import Documenter
+from testdoc.finder import find_tests
+
+
+class TestWords(unittest.TestCase):
+
+    def test_words(self):
+        self.assertEqual(
+            ['test', 'http', 'thing', '0', 'does', 'foo'],
+            search.words('TestHTTPThing0: does foo.'))
+        self.assertEqual([], search.words(None))
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'index.db')
+        self.index = search.SearchIndex(self.path)
+        self.addCleanup(lambda: self.index.close())
+
+    def index_module(self, module):
+        indexer = search.Indexer(self.index)
+        find_tests(Documenter(indexer), module)
+        indexer.finish()
+        return indexer.changed
+
+    def paths(self, query):
+        return [hit.path for hit in self.index.search(query)]
+
+    def test_search(self):
+        from testdoc.tests import hastests
+        self.index_module(hastests)
+        [hit] = self.index.search('qux')
+        self.assertEqual(
+            'testdoc.tests.hastests.SomeTest.test_foo_handles_qux', hit.path)
+        self.assertEqual('Foo Handles Qux', hit.title)
+        self.assertEqual(
+            '%s:%d' % (hastests.__file__.rstrip('co'),
+                       hastests.SomeTest.test_foo_handles_qux.im_func
+                       .func_code.co_firstlineno),
+            hit.location())
+
+    def test_all_words(self):
+        """Only entries with all of the words searched for are found."""
+        from testdoc.tests import hastests
+        self.index_module(hastests)
+        self.assertEqual([], self.paths('qux nosuchword'))
+        self.assertEqual([], self.paths(''))
+
+    def test_ranked(self):
+        """Entries with the words in their titles come first."""
+        self.index.replace_module('mod', [
+            ('module', 'mod', 'mod', None, 'mod.py', None),
+            ('test', 'mod.A.test_other', 'Other',
+             'Something about widgets.', 'mod.py', 3),
+            ('test', 'mod.A.test_widgets', 'Widgets', None, 'mod.py', 5),
+            ])
+        self.assertEqual(
+            ['mod.A.test_widgets', 'mod.A.test_other'],
+            self.paths('widgets'))
+
+    def test_replace(self):
+        """Indexing a module again replaces its entries, and a module that
+        hasn't changed is left alone.
+        """
+        entries = [('module', 'mod', 'mod', 'Old words.', 'mod.py', None)]
+        self.assertTrue(self.index.replace_module('mod', entries))
+        self.assertFalse(self.index.replace_module('mod', entries))
+        self.assertTrue(self.index.replace_module(
+            'mod', [('module', 'mod', 'mod', 'New words.', 'mod.py', None)]))
+        self.assertEqual([], self.paths('old'))
+        self.assertEqual(['mod'], self.paths('new'))
+        self.index.remove_module('mod')
+        self.assertEqual([], self.paths('words'))
+
+    def test_persists(self):
+        from testdoc.tests import hastests
+        self.index_module(hastests)
+        self.index.close()
+        self.index = search.SearchIndex(self.path)
+        self.assertEqual([], self.index_module(hastests))
+        self.assertEqual(1, len(self.index.search('qux')))
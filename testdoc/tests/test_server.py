@@ -0,0 +1,130 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from testdoc import server, static
+from testdoc.formatter import WikiFormatter
+from testdoc.tests.test_watch import MODULE
+
+
+class CountingFinder(object):
+    """Find tests statically, counting how often it is asked to."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, finder, argument):
+        self.calls += 1
+        static.find_tests(finder, argument)
+
+
+class TestDocumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.module = os.path.join(self.directory, 'test_served.py')
+        self.write_module('served', 1000000)
+        self.finder = CountingFinder()
+        self.documentation = server.Documentation(
+            {'static': self.finder}, {'moin': WikiFormatter})
+
+    def write_module(self, doc, mtime):
+        stream = open(self.module, 'w')
+        stream.write(MODULE % (doc,))
+        stream.close()
+        os.utime(self.module, (mtime, mtime))
+
+    def handle(self, **request):
+        request.setdefault('backend', 'static')
+        request.setdefault('arguments', [self.module.decode('utf-8')])
+        return self.documentation.handle(request)
+
+    def test_documents(self):
+        response = self.handle()
+        self.assertFalse(response['failed'])
+        self.assertEqual('', response['errors'])
+        self.assertTrue(response['output'].startswith('= test_served =\n'))
+        self.assertTrue('served' in response['output'])
+
+    def test_unchanged(self):
+        """Modules whose source hasn't changed aren't looked at again."""
+        first = self.handle()
+        self.assertEqual(first, self.handle())
+        self.assertEqual(1, self.finder.calls)
+
+    def test_changed(self):
+        self.handle()
+        self.write_module('changed', 2000000)
+        self.assertTrue('changed' in self.handle()['output'])
+        self.assertEqual(2, self.finder.calls)
+
+    def test_errors(self):
+        response = self.handle(
+            arguments=[os.path.join(self.directory, 'missing.py')])
+        self.assertTrue(response['failed'])
+        self.assertTrue('could not document' in response['errors'])
+
+    def test_cwd(self):
+        """Relative filenames are found from the client's directory, not the
+        server's.
+        """
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tempfile.gettempdir())
+        response = self.handle(
+            arguments=[u'test_served.py'],
+            cwd=self.directory.decode('utf-8'))
+        self.assertFalse(response['failed'], response['errors'])
+        self.assertTrue(response['output'].startswith('= test_served =\n'))
+        self.assertEqual(os.getcwd(), tempfile.gettempdir())
+
+    def test_unknown_format(self):
+        response = self.handle(format='nosuch')
+        self.assertTrue(response['failed'])
+        self.assertEqual('', response['output'])
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'testdoc.sock')
+
+    def test_request(self):
+        documentation = server.Documentation(
+            {'static': static.find_tests}, {'moin': WikiFormatter})
+        listener = server.Server(self.path, documentation)
+        self.addCleanup(listener.server_close)
+        thread = threading.Thread(target=listener.handle_request)
+        thread.start()
+        response = server.request(self.path, {
+            'arguments': ['testdoc.tests.hastests'], 'backend': 'static'})
+        thread.join()
+        self.assertFalse(response['failed'])
+        self.assertTrue(
+            response['output'].startswith('= testdoc.tests.hastests =\n'))
+
+    def test_already_serving(self):
+        documentation = server.Documentation({}, {})
+        listener = server.Server(self.path, documentation)
+        self.addCleanup(listener.server_close)
+        self.assertRaises(
+            socket.error, server.Server, self.path, documentation)
+
+    def test_stale_socket(self):
+        """A socket left behind by a server that has gone is replaced."""
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.path)
+        stale.close()
+        listener = server.Server(self.path, server.Documentation({}, {}))
+        listener.server_close()
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_no_server(self):
+        self.assertRaises(socket.error, server.request, self.path, {})
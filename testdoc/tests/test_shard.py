@@ -0,0 +1,83 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import cStringIO
+import unittest
+
+from testdoc import model, shard
+
+
+class TestPartition(unittest.TestCase):
+
+    def test_parse_shard(self):
+        self.assertEqual(shard.parse_shard('2/3'), (2, 3))
+        self.assertRaises(ValueError, shard.parse_shard, '0/3')
+        self.assertRaises(ValueError, shard.parse_shard, '4/3')
+        self.assertRaises(ValueError, shard.parse_shard, 'two')
+
+    def test_balanced_by_cost(self):
+        costs = {'a': 5.0, 'b': 3.0, 'c': 3.0, 'd': 2.0, 'e': 1.0}
+        self.assertEqual(
+            shard.partition(['a', 'b', 'c', 'd', 'e'], 2, costs),
+            [[0, 3], [1, 2, 4]])
+
+    def test_every_module_once(self):
+        arguments = ['m%d' % (i,) for i in range(10)]
+        shards = shard.partition(arguments, 3, {'m0': 1.0})
+        self.assertEqual(
+            sorted(sum(shards, [])), range(len(arguments)))
+
+
+class TestMerge(unittest.TestCase):
+    """Merging the shards gives their modules in the order of the whole
+    list.
+    """
+
+    def write_shards(self, arguments, count, backend='static'):
+        files = {}
+        for index, positions in enumerate(
+            shard.partition(arguments, count, {'x': 1.0}), 1):
+            stream = cStringIO.StringIO()
+            writer = shard.ShardWriter(
+                stream, index, count, arguments, positions, backend)
+            for position in positions:
+                argument = arguments[position]
+                writer.add(position, argument,
+                           model.Module(argument, None, None, []), None)
+            files['shard%d' % (index,)] = stream.getvalue()
+        return files
+
+    def merge(self, files, costs=None):
+        streams = dict((name, cStringIO.StringIO(data))
+                       for name, data in files.items())
+        return list(shard.merge(streams, costs))
+
+    def test_in_order(self):
+        arguments = ['m%d' % (i,) for i in range(7)]
+        costs = {}
+        results = self.merge(self.write_shards(arguments, 3), costs)
+        self.assertEqual(
+            [(argument, module.__name__, error)
+             for argument, module, error in results],
+            [(argument, argument, None) for argument in arguments])
+        self.assertEqual(sorted(costs), arguments)
+
+    def test_missing_shard(self):
+        files = self.write_shards(['a', 'b', 'c'], 3)
+        del files['shard2']
+        self.assertRaises(shard.ShardError, self.merge, files)
+
+    def test_different_runs(self):
+        """Shards of different lists of modules, or of the same list found
+        differently, are rejected before anything is merged.
+        """
+        files = self.write_shards(['a', 'b', 'c', 'd'], 2)
+        files['shard2'] = self.write_shards(['a', 'b', 'c', 'e'], 2)['shard2']
+        self.assertRaises(shard.ShardError, self.merge, files)
+        files['shard2'] = self.write_shards(
+            ['a', 'b', 'c', 'd'], 2, 'import')['shard2']
+        self.assertRaises(shard.ShardError, self.merge, files)
+
+    def test_cut_short(self):
+        files = self.write_shards(['a', 'b', 'c', 'd'], 2)
+        files['shard1'] = files['shard1'][:-10]
+        self.assertRaises(shard.ShardError, self.merge, files)
@@ -0,0 +1,100 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import cStringIO
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+from testdoc import documenter, model, sink
+from testdoc.formatter import WikiFormatter
+
+
+class RecordingStream(object):
+    """A stream that can't seek, and remembers each write."""
+
+    def __init__(self):
+        self.writes = []
+        self.flushes = 0
+
+    def write(self, data):
+        self.writes.append(data)
+
+    def flush(self):
+        self.flushes += 1
+
+
+def document(output, names):
+    doc = sink.ModuleSplitter(
+        documenter.Documenter(WikiFormatter(output)), [output])
+    for name in names:
+        model.emit(doc, model.Module(name, 'About %s.' % (name,), None, []))
+    output.close()
+
+
+class TestStreamSink(unittest.TestCase):
+
+    def test_batches_writes(self):
+        stream = RecordingStream()
+        output = sink.StreamSink(stream, buffer_size=10)
+        output.write('abc')
+        output.write('def')
+        self.assertEqual(stream.writes, [])
+        output.write('ghij')
+        self.assertEqual(stream.writes, ['abcdefghij'])
+        output.write('k')
+        output.flush()
+        self.assertEqual(stream.writes, ['abcdefghij', 'k'])
+        self.assertEqual(stream.flushes, 1)
+
+    def test_close_flushes(self):
+        stream = RecordingStream()
+        document(sink.StreamSink(stream), ['foo', 'bar'])
+        self.assertEqual(
+            stream.writes,
+            ['= foo =\n\nAbout foo.\n\n= bar =\n\nAbout bar.\n\n'])
+
+
+class TestModuleSinks(unittest.TestCase):
+    """Each module's documentation goes to its own file."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_directory(self):
+        document(sink.DirectorySink(self.directory, '.txt'), ['foo', 'bar'])
+        self.assertEqual(
+            sorted(os.listdir(self.directory)), ['bar.txt', 'foo.txt'])
+        self.assertEqual(
+            open(os.path.join(self.directory, 'bar.txt')).read(),
+            '= bar =\n\nAbout bar.\n\n')
+
+    def test_directory_mode(self):
+        """Files in the directory can be read by others, as those written
+        with --output can.
+        """
+        self.addCleanup(os.umask, os.umask(022))
+        document(sink.DirectorySink(self.directory, '.txt'), ['foo'])
+        mode = os.stat(os.path.join(self.directory, 'foo.txt')).st_mode
+        self.assertEqual(0644, mode & 0777)
+
+    def test_tar(self):
+        stream = RecordingStream()
+        document(sink.TarSink(stream, '.txt'), ['foo', 'bar'])
+        archive = tarfile.open(
+            fileobj=cStringIO.StringIO(''.join(stream.writes)), mode='r:gz')
+        self.assertEqual(archive.getnames(), ['foo.txt', 'bar.txt'])
+        self.assertEqual(
+            archive.extractfile('foo.txt').read(),
+            '= foo =\n\nAbout foo.\n\n')
+
+    def test_zip(self):
+        filename = os.path.join(self.directory, 'docs.zip')
+        document(sink.open_sink(filename, '.txt'), ['foo', 'bar'])
+        archive = zipfile.ZipFile(filename)
+        self.assertEqual(archive.namelist(), ['foo.txt', 'bar.txt'])
+        self.assertEqual(
+            archive.read('bar.txt'), '= bar =\n\nAbout bar.\n\n')
@@ -0,0 +1,68 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from testdoc import model, site
+
+
+def make_module(name, doc='A module.', test_doc='Does foo.'):
+    return model.Module(name, doc, name + '.py', [
+        model.TestClass('FooTest', None, name, 3, [
+            model.Test('test_foo', test_doc, 4)])])
+
+
+class TestSite(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def read(self, name):
+        return open(os.path.join(self.directory, name)).read()
+
+    def test_pages(self):
+        written = site.Site(self.directory).update(
+            [make_module('first'), make_module('second')])
+        self.assertEqual(
+            ['first.html', 'second.html', 'index.html'], written)
+        index = self.read('index.html')
+        self.assertTrue('<a href="first.html">first</a>' in index)
+        page = self.read('first.html')
+        self.assertTrue('<a href="index.html">' in page)
+        self.assertTrue('<h2>Foo</h2>' in page)
+        self.assertTrue('<h3>Foo</h3>\n<p>Does foo.</p>' in page)
+
+    def test_escapes(self):
+        site.Site(self.directory).update(
+            [make_module('first', test_doc='a < b & c')])
+        self.assertTrue('<p>a &lt; b &amp; c</p>' in self.read('first.html'))
+
+    def test_unchanged(self):
+        """Only the pages of modules that have changed are written again,
+        even by a new Site for the same directory.
+        """
+        site.Site(self.directory).update(
+            [make_module('first'), make_module('second')])
+        written = site.Site(self.directory).update(
+            [make_module('first'), make_module('second', test_doc='New.')])
+        self.assertEqual(['second.html'], written)
+        self.assertEqual([], site.Site(self.directory).update(
+            [make_module('first'), make_module('second', test_doc='New.')]))
+
+    def test_removed(self):
+        output = site.Site(self.directory)
+        output.update([make_module('first'), make_module('second')])
+        self.assertEqual(['index.html'], output.update([make_module('first')]))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.directory, 'second.html')))
+        self.assertEqual(['first'], output.hashes.keys())
+
+    def test_missing_page(self):
+        """A page that has gone missing is written again."""
+        output = site.Site(self.directory)
+        output.update([make_module('first')])
+        os.unlink(os.path.join(self.directory, 'first.html'))
+        self.assertEqual(['first.html'], output.update([make_module('first')]))
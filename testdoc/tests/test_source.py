@@ -0,0 +1,199 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import inspect
+import os
+import shutil
+import tempfile
+import unittest
+
+from testdoc import source
+
+
+SAMPLE = '''\
+# Module comment.
+
+class Nested(object):
+    class Inner(object):
+        pass
+
+class Inner(object):
+    # Internal comment.
+    # Continued.
+
+    pass
+
+# Preceding comment.
+@decorator
+def function():
+    pass
+'''
+
+
+class TestSourceIndex(unittest.TestCase):
+    """A source index records where each class and function in a file is,
+    along with the comments around it, so that we only read the file once.
+    """
+
+    def setUp(self):
+        self.index = source.SourceIndex(SAMPLE.splitlines(True))
+
+    def test_class_line(self):
+        """Like inspect.findsource, a top-level class is preferred to a
+        nested one of the same name.
+        """
+        self.assertEqual(2, self.index.class_line('Nested'))
+        self.assertEqual(6, self.index.class_line('Inner'))
+
+    def test_missing_class(self):
+        self.assertRaises(IOError, self.index.class_line, 'Missing')
+
+    def test_function_line(self):
+        """Functions are found at the nearest decorator or 'def' at or
+        before the first line of their code.
+        """
+        self.assertEqual(13, self.index.function_line(14))
+        self.assertEqual(14, self.index.function_line(15))
+        self.assertEqual(14, self.index.function_line(16))
+
+    def test_comments(self):
+        self.assertEqual('# Preceding comment.\n', self.index.comments(13))
+        self.assertEqual(None, self.index.comments(6))
+
+    def test_module_comments(self):
+        self.assertEqual(
+            '# Module comment.\n', self.index.comments(0, module=True))
+
+    def test_internal_comments(self):
+        self.assertEqual(
+            '# Internal comment.\n# Continued.',
+            self.index.internal_comments(6))
+        self.assertEqual(None, self.index.internal_comments(13))
+
+
+class TestFindSource(unittest.TestCase):
+
+    def test_matches_inspect(self):
+        """The line numbers found through the index are the ones that
+        inspect would find.
+        """
+        from testdoc.tests import hastests
+        for obj in [hastests.SomeTest, hastests.AnotherTest,
+                    hastests.SomeTest.test_bar, hastests.AnotherTest.test_baz]:
+            self.assertEqual(
+                inspect.getsourcelines(obj)[1], source.get_lineno(obj))
+
+    def test_module(self):
+        from testdoc.tests import hastests
+        index, lnum, module = source.findsource(hastests)
+        self.assertEqual((0, True), (lnum, module))
+
+    def test_no_source(self):
+        self.assertEqual(None, source.findsource(object()))
+        self.assertRaises(IOError, source.get_lineno, object())
+
+
+STRINGS = '''\
+x = """
+# Not a comment.
+class NotAClass:
+"""
+
+# A comment.
+def function():
+    y = """
+    # Not a comment either.
+    """
+'''
+
+
+class TestTokenizedIndex(unittest.TestCase):
+    """The index is built by tokenizing the source, so things that only look
+    like comments or classes because they are inside strings are ignored.
+    """
+
+    def setUp(self):
+        self.lines = STRINGS.splitlines(True)
+        self.index = source.SourceIndex(self.lines)
+
+    def test_class_in_string(self):
+        self.assertRaises(IOError, self.index.class_line, 'NotAClass')
+
+    def test_comment_in_string(self):
+        self.assertEqual(
+            None, self.index.internal_comments(0, module=True))
+        self.assertEqual('# A comment.\n', self.index.comments(6))
+        self.assertEqual(None, self.index.internal_comments(6))
+
+    def test_scan_tokens(self):
+        classes, functions, comment_lines = source.scan_tokens(self.lines)
+        self.assertEqual([], classes)
+        self.assertEqual([6], functions)
+        self.assertEqual(set([5]), comment_lines)
+
+    def test_untokenizable(self):
+        """Source that can't be tokenized is scanned line by line instead."""
+        index = source.SourceIndex(['class Foo(object):\n', '    x = (\n'])
+        self.assertEqual(0, index.class_line('Foo'))
+
+
+class TestIndexCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def make_file(self, name, text):
+        filename = os.path.join(self.directory, name)
+        stream = open(filename, 'w')
+        stream.write(text)
+        stream.close()
+        return filename
+
+    def test_get(self):
+        filename = self.make_file('a.py', 'class A:\n    pass\n')
+        cache = source.IndexCache()
+        index = cache.get(filename)
+        self.assertEqual(0, index.class_line('A'))
+        self.assertTrue(index is cache.get(filename))
+        self.assertEqual(18, cache.size)
+
+    def test_no_source(self):
+        cache = source.IndexCache()
+        self.assertEqual(
+            None, cache.get(os.path.join(self.directory, 'missing.py')))
+
+    def test_evicts_least_recently_used(self):
+        first = self.make_file('a.py', 'a = 1\n')
+        second = self.make_file('b.py', 'b = 1\n')
+        third = self.make_file('c.py', 'c = 1\n')
+        cache = source.IndexCache(max_bytes=12)
+        cache.get(first)
+        cache.get(second)
+        cache.get(first)
+        cache.get(third)
+        self.assertTrue(first in cache)
+        self.assertFalse(second in cache)
+        self.assertTrue(third in cache)
+        self.assertEqual(12, cache.size)
+
+    def test_keeps_one_file_over_budget(self):
+        filename = self.make_file('a.py', 'a = 1\n')
+        cache = source.IndexCache(max_bytes=1)
+        self.assertNotEqual(None, cache.get(filename))
+        self.assertTrue(filename in cache)
+
+    def test_forget(self):
+        filename = self.make_file('a.py', 'a = 1\n')
+        cache = source.IndexCache()
+        cache.get(filename)
+        cache.forget(filename)
+        self.assertFalse(filename in cache)
+        self.assertEqual(0, cache.size)
+        cache.forget(filename)
+
+    def test_release(self):
+        from testdoc.tests import hastests
+        filename = source.source_filename(hastests.__file__)
+        source.get_index(filename)
+        source.release(hastests)
+        self.assertFalse(filename in source._indexes)
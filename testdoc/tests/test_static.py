@@ -0,0 +1,91 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import os
+import unittest
+
+from testdoc import static
+from testdoc.finder import find_tests
+from testdoc.reflect import extract_docs
+
+
+class DocsCollector(object):
+    def __init__(self):
+        self.log = []
+
+    def got_module(self, module):
+        self.log.append(('module', module.__name__, extract_docs(module)))
+
+    def got_test_class(self, klass):
+        self.log.append(('class', klass.__name__, extract_docs(klass)))
+
+    def got_test(self, method):
+        self.log.append(('method', method.__name__, extract_docs(method)))
+
+
+class TestStaticFinder(unittest.TestCase):
+    """The static finder parses test modules instead of importing them, but
+    should find the same tests and documentation as the default finder.
+    """
+
+    def assertSameAsImport(self, module):
+        expected = DocsCollector()
+        find_tests(expected, module)
+        observed = DocsCollector()
+        static.find_tests(observed, module.__name__)
+        self.assertEqual(expected.log, observed.log)
+
+    def test_empty(self):
+        from testdoc.tests import empty
+        self.assertSameAsImport(empty)
+
+    def test_emptywithdocs(self):
+        from testdoc.tests import emptywithdocs
+        self.assertSameAsImport(emptywithdocs)
+
+    def test_hasemptycase(self):
+        from testdoc.tests import hasemptycase
+        self.assertSameAsImport(hasemptycase)
+
+    def test_hastests(self):
+        from testdoc.tests import hastests
+        self.assertSameAsImport(hastests)
+
+    def test_inheritance(self):
+        """Base classes are followed within a module and into other modules
+        that can be parsed. Classes that don't derive from TestCase are
+        ignored.
+        """
+        from testdoc.tests import hasinheritance
+        self.assertSameAsImport(hasinheritance)
+
+    def test_filename(self):
+        from testdoc.tests import hastests
+        filename = os.path.splitext(hastests.__file__)[0] + '.py'
+        observed = DocsCollector()
+        static.find_tests(observed, filename)
+        self.assertEqual('testdoc.tests.hastests', observed.log[0][1])
+
+    def test_bounded(self):
+        """Parsed modules are forgotten once their sources add up to more
+        than max_bytes, and parsed again if they are needed.
+        """
+        from testdoc.tests import hasinheritance
+        expected = DocsCollector()
+        find_tests(expected, hasinheritance)
+        finder = static.StaticFinder(max_bytes=1)
+        for i in range(2):
+            observed = DocsCollector()
+            finder.find_tests(observed, hasinheritance.__name__)
+            self.assertEqual(expected.log, observed.log)
+            self.assertEqual(1, len(finder._modules))
+
+    def test_missing_module(self):
+        self.assertRaises(
+            ImportError, static.StaticFinder().parse_name,
+            'testdoc.tests.doesnotexist')
+
+    def test_find_module_file(self):
+        from testdoc.tests import hastests
+        self.assertEqual(
+            os.path.splitext(hastests.__file__)[0] + '.py',
+            static.find_module_file('testdoc.tests.hastests'))
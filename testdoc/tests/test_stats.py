@@ -0,0 +1,91 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import cStringIO
+import os
+import shutil
+import tempfile
+import unittest
+
+from testdoc import finder, model, static, stats
+from testdoc.tests import hastests
+
+
+SOURCE = '''\
+import unittest
+
+class TestThings(unittest.TestCase):
+
+    def test_docstring(self):
+        """Has a docstring."""
+
+    # Has a comment.
+    def test_comment(self):
+        pass
+
+    def test_internal_comment(self):
+        # Has a comment inside.
+        pass
+
+    def test_nothing(self):
+        pass
+'''
+
+
+def module_counts(counter):
+    return [(name, counts.docstrings, counts.comments, counts.undocumented)
+            for name, counts, classes in counter.modules]
+
+
+class TestCounter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.filename = os.path.join(self.directory, 'test_things.py')
+        stream = open(self.filename, 'w')
+        stream.write(SOURCE)
+        stream.close()
+
+    def test_imported(self):
+        counter = stats.Counter()
+        finder.find_tests(counter, hastests)
+        self.assertEqual(
+            module_counts(counter), [('testdoc.tests.hastests', 2, 0, 1)])
+        self.assertEqual(
+            [(name, c.total) for name, c in counter.modules[0][2]],
+            [('SomeTest', 2), ('AnotherTest', 1)])
+
+    def test_static(self):
+        counter = stats.Counter()
+        static.find_tests(counter, self.filename)
+        self.assertEqual(module_counts(counter), [('test_things', 1, 2, 1)])
+        self.assertEqual(counter.total.percent(), 75.0)
+
+    def test_recorded(self):
+        """Where the documentation of each test came from is kept when the
+        tests are recorded, as they are to be cached or sent between
+        processes.
+        """
+        counter = stats.Counter()
+        model.emit(counter, model.record(finder.find_tests, hastests))
+        self.assertEqual(
+            module_counts(counter), [('testdoc.tests.hastests', 2, 0, 1)])
+        counter = stats.Counter()
+        model.emit(
+            counter, model.record(static.find_tests, self.filename))
+        self.assertEqual(module_counts(counter), [('test_things', 1, 2, 1)])
+
+    def test_report(self):
+        counter = stats.Counter()
+        static.find_tests(counter, self.filename)
+        output = cStringIO.StringIO()
+        counter.report(output)
+        self.assertEqual(output.getvalue().splitlines(), [
+            'Name          Docstrings  Comments  Undocumented  Documented',
+            'test_things            1         2             1       75.0%',
+            '  TestThings           1         2             1       75.0%',
+            'TOTAL                  1         2             1       75.0%',
+            ])
+
+    def test_no_tests(self):
+        self.assertEqual(stats.Counts().percent(), 100.0)
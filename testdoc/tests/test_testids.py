@@ -0,0 +1,60 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import cStringIO
+import unittest
+
+from testdoc import testids
+from testdoc.finder import find_tests
+from testdoc.tests import hastests
+from testdoc.tests.test_finder import MockCollector
+
+
+class TestReadIds(unittest.TestCase):
+
+    def read(self, text):
+        return list(testids.read_ids(cStringIO.StringIO(text)))
+
+    def test_one_per_line(self):
+        self.assertEqual(
+            self.read('foo.FooTest.test_a\n\nfoo.FooTest.test_b\n'),
+            ['foo.FooTest.test_a', 'foo.FooTest.test_b'])
+
+    def test_tags_ignored(self):
+        self.assertEqual(
+            self.read('foo.FooTest.test_a [tag]\n'), ['foo.FooTest.test_a'])
+
+    def test_subunit_v1(self):
+        self.assertEqual(
+            self.read('test: foo.FooTest.test_a\n'
+                      'success: foo.FooTest.test_a\n'),
+            ['foo.FooTest.test_a'])
+
+    def test_split_id(self):
+        self.assertEqual(
+            testids.split_id('foo.bar.BarTest.test_baz(scenario)'),
+            ('foo.bar', 'BarTest', 'test_baz'))
+        self.assertRaises(ValueError, testids.split_id, 'foo.bar')
+
+
+class TestSelection(unittest.TestCase):
+
+    def test_modules_in_order_listed(self):
+        selection = testids.Selection.from_ids([
+            'b.BTest.test_a', 'a.ATest.test_a', 'b.BTest.test_b'])
+        self.assertEqual(selection.modules, ['b', 'a'])
+        self.assertEqual(
+            selection.tests['b'], {'BTest': set(['test_a', 'test_b'])})
+
+    def test_only_selected_in_source_order(self):
+        selection = testids.Selection.from_ids([
+            'testdoc.tests.hastests.SomeTest.test_bar',
+            'testdoc.tests.hastests.SomeTest.test_foo_handles_qux',
+            'testdoc.tests.hastests.SomeTest.test_missing'])
+        collector = MockCollector()
+        selection.wrap(find_tests)(collector, hastests)
+        self.assertEqual(
+            collector.log, [
+                ('module', hastests),
+                ('class', hastests.SomeTest),
+                ('method', hastests.SomeTest.test_foo_handles_qux),
+                ('method', hastests.SomeTest.test_bar)])
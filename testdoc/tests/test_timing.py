@@ -0,0 +1,96 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import StringIO
+import unittest
+
+from testdoc import timing
+from testdoc.documenter import Documenter
+from testdoc.finder import find_tests
+from testdoc.formatter import JSONLinesFormatter
+from testdoc.tests.test_documenter import MockFormatter
+
+
+class FakeClock(object):
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.profiler = timing.Profiler(self.clock)
+
+    def test_wrap(self):
+        """Wrapped functions are counted and timed, and still return their
+        results.
+        """
+        def work(seconds):
+            self.clock.advance(seconds)
+            return seconds
+        timed = self.profiler.wrap('work', work)
+        self.assertEqual(2, timed(2))
+        timed(3)
+        self.assertEqual({'work': [2, 5.0]}, self.profiler.phases)
+
+    def test_nested(self):
+        """Time spent in an inner phase is not counted in the outer one."""
+        inner = self.profiler.wrap('inner', lambda: self.clock.advance(2))
+
+        def outer():
+            self.clock.advance(1)
+            inner()
+        self.profiler.wrap('outer', outer)()
+        self.assertEqual(
+            {'inner': [1, 2.0], 'outer': [1, 1.0]}, self.profiler.phases)
+
+    def test_modules(self):
+        """Everything done while finding the tests in a module counts
+        towards it.
+        """
+        def fake_find_tests(finder, argument):
+            self.profiler.wrap('inner', lambda: self.clock.advance(2))()
+            self.clock.advance(len(argument))
+        timed = self.profiler.wrap_find_tests(fake_find_tests)
+        timed(None, 'a')
+        timed(None, 'bbb')
+        self.assertEqual({'a': 3.0, 'bbb': 5.0}, self.profiler.modules)
+
+    def test_instrument_documenter(self):
+        from testdoc.tests import hastests
+        formatter = MockFormatter()
+        documenter = Documenter(formatter)
+        self.profiler.instrument_documenter(documenter)
+        find_tests(documenter, hastests)
+        phases = self.profiler.phases
+        self.assertEqual(6, phases['document'][0])
+        self.assertEqual(6, phases['extract_docs'][0])
+        self.assertEqual(5, phases['humanise'][0])
+        self.assertEqual(len(formatter.log), phases['format'][0])
+
+    def test_instrument_entry_formatter(self):
+        """Formatters with only an C{entry} method have it timed."""
+        from testdoc.tests import hastests
+        output = StringIO.StringIO()
+        documenter = Documenter(JSONLinesFormatter(output))
+        self.profiler.instrument_documenter(documenter)
+        find_tests(documenter, hastests)
+        self.assertEqual(6, self.profiler.phases['format'][0])
+        self.assertEqual(6, len(output.getvalue().splitlines()))
+
+    def test_report(self):
+        self.profiler.wrap_find_tests(
+            lambda finder, arg: self.clock.advance(1))(None, 'some.module')
+        stream = StringIO.StringIO()
+        self.profiler.report(stream)
+        output = stream.getvalue()
+        self.assertTrue('find_tests' in output, output)
+        self.assertTrue('some.module' in output, output)
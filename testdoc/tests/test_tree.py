@@ -0,0 +1,88 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import unittest
+
+from testdoc import tree
+from testdoc.documenter import Documenter
+from testdoc.finder import find_tests
+from testdoc.tests.test_documenter import MockFormatter
+
+
+class TestTree(unittest.TestCase):
+    """Tests are found once to build a document tree, which can then be
+    rendered by many formatters.
+    """
+
+    def build(self, *modules):
+        builder = tree.TreeBuilder()
+        documenter = Documenter(builder)
+        for module in modules:
+            find_tests(documenter, module)
+        return builder.document
+
+    def test_render(self):
+        """Rendering a tree sends a formatter the same calls as documenting
+        the modules directly.
+        """
+        from testdoc.tests import hastests, hasinheritance
+        expected = MockFormatter()
+        documenter = Documenter(expected)
+        find_tests(documenter, hastests)
+        find_tests(documenter, hasinheritance)
+        document = self.build(hastests, hasinheritance)
+        for i in range(2):
+            observed = MockFormatter()
+            tree.render(document, observed)
+            self.assertEqual(expected.log, observed.log)
+
+    def test_structure(self):
+        from testdoc.tests import hastests
+        document = self.build(hastests)
+        [module] = document.modules
+        self.assertEqual('testdoc.tests.hastests', module.title)
+        self.assertEqual(('A sample test module.',), module.paragraphs)
+        self.assertEqual(
+            ['Some', 'Another'], [klass.title for klass in module.classes])
+        self.assertEqual(
+            ['Foo Handles Qux', 'Bar'],
+            [test.title for test in module.classes[0].tests])
+        self.assertEqual((), module.classes[1].tests[0].paragraphs)
+
+    def test_locations(self):
+        """A tree built with locations sends formatters with an entry method
+        the same calls as documenting the modules directly.
+        """
+        from testdoc.tests import hastests
+
+        class EntryFormatter(object):
+            def __init__(self):
+                self.log = []
+
+            def entry(self, *args):
+                self.log.append(args)
+        expected = EntryFormatter()
+        find_tests(Documenter(expected), hastests)
+        builder = tree.TreeBuilder(locations=True)
+        find_tests(Documenter(builder), hastests)
+        observed = EntryFormatter()
+        tree.render(builder.document, observed)
+        self.assertEqual(expected.log, observed.log)
+        plain = MockFormatter()
+        tree.render(self.build(hastests), plain)
+        observed = MockFormatter()
+        tree.render(builder.document, observed)
+        self.assertEqual(plain.log, observed.log)
+
+    def test_slots(self):
+        """Nodes have no instance dictionaries, to keep large trees small."""
+        for node in [tree.ModuleNode('a'), tree.ClassNode('b'),
+                     tree.TestNode('c')]:
+            self.assertFalse(hasattr(node, '__dict__'))
+
+    def test_clear(self):
+        from testdoc.tests import hastests
+        builder = tree.TreeBuilder()
+        find_tests(Documenter(builder), hastests)
+        document = builder.clear()
+        self.assertEqual(1, len(document.modules))
+        self.assertEqual([], builder.document.modules)
@@ -0,0 +1,201 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+import cStringIO
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from testdoc import finder, reflect, static, watch
+from testdoc.formatter import WikiFormatter
+
+
+MODULE = '''\
+"""%s"""
+
+import unittest
+
+class FooTest(unittest.TestCase):
+    def test_foo(self):
+        pass
+'''
+
+
+def import_find_tests(collector, filename):
+    finder.find_tests(collector, reflect.filenameToModule(filename))
+
+
+class RecordingOutput(object):
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, modules, changed):
+        self.calls.append(
+            ([m.__doc__ for m in modules], [m.__doc__ for m in changed]))
+
+
+class TestWatcher(unittest.TestCase):
+    """A watcher only finds the tests again in modules that have changed."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.first = self.write_module('test_watch_first.py', 'first')
+        self.second = self.write_module('test_watch_second.py', 'second')
+        self.addCleanup(sys.modules.pop, 'test_watch_first', None)
+        self.addCleanup(sys.modules.pop, 'test_watch_second', None)
+
+    def write_module(self, name, doc, mtime=1000000):
+        path = os.path.join(self.directory, name)
+        stream = open(path, 'w')
+        stream.write(MODULE % (doc,))
+        stream.close()
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def make_watcher(self, find_tests):
+        output = RecordingOutput()
+        watcher = watch.Watcher(
+            find_tests, [self.first, self.second], output)
+        return watcher, output
+
+    def test_initial(self):
+        watcher, output = self.make_watcher(static.find_tests)
+        watcher.update()
+        self.assertEqual(
+            [(['first', 'second'], ['first', 'second'])], output.calls)
+
+    def test_unchanged(self):
+        watcher, output = self.make_watcher(static.find_tests)
+        watcher.update()
+        self.assertEqual([], watcher.update())
+        self.assertEqual(1, len(output.calls))
+
+    def test_changed(self):
+        for find_tests in [static.StaticFinder().find_tests,
+                           import_find_tests]:
+            watcher, output = self.make_watcher(find_tests)
+            watcher.update()
+            self.write_module(
+                'test_watch_second.py', 'changed', mtime=2000000)
+            watcher.update()
+            self.assertEqual(
+                (['first', 'changed'], ['changed']), output.calls[-1])
+            self.write_module('test_watch_second.py', 'second')
+
+    def test_error_keeps_old(self):
+        """If a module can't be documented after a change, the old
+        documentation is kept and the error is reported.
+        """
+        errors = []
+
+        class Errors(object):
+            write = errors.append
+        watcher, output = self.make_watcher(static.find_tests)
+        watcher.errors = Errors()
+        watcher.update()
+        stream = open(self.second, 'w')
+        stream.write('def broken(:\n')
+        stream.close()
+        os.utime(self.second, (2000000, 2000000))
+        self.assertEqual([], watcher.update())
+        self.assertEqual('second', watcher.modules[self.second].__doc__)
+        self.assertEqual(1, len(errors))
+
+    def test_first_error_not_retried(self):
+        """A module whose tests can't be found the first time is only looked
+        at again, and its error reported again, once it changes.
+        """
+        errors = []
+
+        class Errors(object):
+            write = errors.append
+        stream = open(self.second, 'w')
+        stream.write('def broken(:\n')
+        stream.close()
+        calls = []
+
+        def find_tests(finder, argument):
+            calls.append(argument)
+            static.find_tests(finder, argument)
+        watcher, output = self.make_watcher(find_tests)
+        watcher.errors = Errors()
+        watcher.update()
+        watcher.update()
+        self.assertEqual([self.first, self.second], calls)
+        self.assertEqual(1, len(errors))
+        self.assertTrue(self.second in watcher.failed)
+        self.write_module('test_watch_second.py', 'fixed', mtime=2000000)
+        watcher.update()
+        self.assertEqual('fixed', watcher.modules[self.second].__doc__)
+        self.assertEqual({}, watcher.failed)
+
+    def test_new_module(self):
+        """A module that didn't exist when the watcher started is found once
+        it does, even though the resolver remembered it was missing.
+        """
+        resolver = reflect.Resolver()
+
+        def find_tests(collector, name):
+            finder.find_tests(collector, resolver.namedAny(name))
+        sys.path.insert(0, self.directory)
+        self.addCleanup(sys.path.remove, self.directory)
+        self.addCleanup(sys.modules.pop, 'test_watch_late', None)
+        watcher = watch.Watcher(
+            find_tests, ['test_watch_late'], RecordingOutput(),
+            errors=cStringIO.StringIO(), resolver=resolver)
+        watcher.update()
+        self.assertTrue('test_watch_late' in watcher.failed)
+        self.write_module('test_watch_late.py', 'late')
+        watcher.update()
+        self.assertEqual('late', watcher.modules['test_watch_late'].__doc__)
+
+    def test_run(self):
+        sleeps = []
+        watcher, output = self.make_watcher(static.find_tests)
+        watcher.run(iterations=3, sleep=sleeps.append)
+        self.assertEqual([1.0, 1.0], sleeps)
+
+
+class TestWriteAtomically(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'out.txt')
+        self.addCleanup(os.umask, os.umask(022))
+
+    def mode(self):
+        return os.stat(self.path).st_mode & 0777
+
+    def test_new_file(self):
+        """A new file gets the permissions the umask allows, not those of a
+        temporary file.
+        """
+        watch.write_atomically(self.path, lambda stream: stream.write('x'))
+        self.assertEqual(0644, self.mode())
+
+    def test_keeps_mode(self):
+        open(self.path, 'w').close()
+        os.chmod(self.path, 0664)
+        watch.write_atomically(self.path, lambda stream: stream.write('x'))
+        self.assertEqual(0664, self.mode())
+        self.assertEqual('x', open(self.path).read())
+
+
+class TestDirectoryOutput(unittest.TestCase):
+
+    def test_writes_changed(self):
+        from testdoc import model
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        output = watch.DirectoryOutput(WikiFormatter, directory, '.txt')
+        first = model.Module('first', None, None, [])
+        second = model.Module('second', None, None, [])
+        output([first, second], [second])
+        self.assertEqual(['second.txt'], os.listdir(directory))
+        self.assertEqual(
+            '= second =\n\n',
+            open(os.path.join(directory, 'second.txt')).read())
@@ -0,0 +1,117 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Find out where the time goes when documenting tests.
+
+A L{Profiler} wraps the functions and methods that do each phase of the work
+-- importing modules, finding tests, extracting docs, turning names into
+titles and formatting -- and counts the calls to each and the time spent in
+them. Time spent in a phase called from another phase is only counted
+against the inner one.
+
+Time is also added up per module: everything done while finding the tests in
+a module counts towards it.
+"""
+
+import time
+
+
+DOCUMENTER_PHASES = [
+    ('document', ['got_module', 'got_test_class', 'got_test']),
+    ('extract_docs', ['extract_docs']),
+    ('humanise', ['format_module', 'format_test', 'format_test_class']),
+    ]
+
+
+FORMATTER_PHASES = [
+    ('format', ['title', 'section', 'subsection', 'paragraph', 'entry']),
+    ]
+
+
+class Profiler(object):
+    """Count the calls to and time spent in each phase of documenting.
+
+    @ivar phases: A dict mapping phase names to C{[calls, seconds]}.
+    @ivar modules: A dict mapping modules to seconds.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.phases = {}
+        self.modules = {}
+        self._module = None
+        # The time spent in phases called by each running phase.
+        self._inner = []
+
+    def _record(self, phase, seconds):
+        counts = self.phases.setdefault(phase, [0, 0.0])
+        counts[0] += 1
+        counts[1] += seconds
+        if self._module is not None:
+            self.modules[self._module] = (
+                self.modules.get(self._module, 0.0) + seconds)
+
+    def wrap(self, phase, function):
+        """Return a version of C{function} that is timed as C{phase}."""
+        def timed(*args, **kwargs):
+            self._inner.append(0.0)
+            start = self.clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = self.clock() - start
+                self._record(phase, elapsed - self._inner.pop())
+                if self._inner:
+                    self._inner[-1] += elapsed
+        return timed
+
+    def wrap_find_tests(self, find_tests, phase='find_tests'):
+        """Return a version of C{find_tests} that is timed as C{phase}, and
+        that counts everything done inside it towards the module it is
+        given.
+        """
+        timed = self.wrap(phase, find_tests)
+
+        def find_tests_in_module(finder, argument):
+            previous = self._module
+            self._module = argument
+            try:
+                return timed(finder, argument)
+            finally:
+                self._module = previous
+        return find_tests_in_module
+
+    def instrument(self, obj, phases):
+        """Time the methods of C{obj}.
+
+        @param phases: A list of C{(phase, method_names)} pairs. Methods
+            C{obj} doesn't have are skipped, since a formatter has either
+            C{entry} or the others.
+        """
+        for phase, names in phases:
+            for name in names:
+                method = getattr(obj, name, None)
+                if method is not None:
+                    setattr(obj, name, self.wrap(phase, method))
+
+    def instrument_documenter(self, documenter):
+        """Time the callbacks of a L{Documenter} and of its formatter."""
+        self.instrument(documenter, DOCUMENTER_PHASES)
+        self.instrument(documenter.formatter, FORMATTER_PHASES)
+
+    def report(self, stream, limit=10):
+        """Write a summary of the phases, and of the C{limit} slowest
+        modules, to C{stream}.
+        """
+        stream.write('testdoc: profile:\n')
+        stream.write('  %-14s %8s %10s\n' % ('phase', 'calls', 'seconds'))
+        phases = sorted(
+            self.phases.items(), key=lambda item: item[1][1], reverse=True)
+        for phase, (calls, seconds) in phases:
+            stream.write('  %-14s %8d %10.4f\n' % (phase, calls, seconds))
+        if not self.modules:
+            return
+        stream.write('  slowest modules:\n')
+        modules = sorted(
+            self.modules.items(), key=lambda item: item[1], reverse=True)
+        for module, seconds in modules[:limit]:
+            stream.write('  %10.4f  %s\n' % (seconds, module))
@@ -0,0 +1,146 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""A document tree, built once and rendered by any number of formatters.
+
+A L{TreeBuilder} is a formatter: give it to a L{Documenter} and it builds a
+L{Document} from the titles, sections, subsections and paragraphs it is sent.
+L{render} then sends the same calls to any other formatter.
+
+The nodes use C{__slots__}, and nodes without paragraphs share one empty
+tuple, so that the tree for a very large suite stays small. The raw name,
+file and line of each node are only kept if the builder is asked to, for
+formatters with an C{entry} method.
+"""
+
+
+class Document(object):
+    """The root of a document tree: a list of L{ModuleNode}s."""
+
+    __slots__ = ('modules',)
+
+    def __init__(self):
+        self.modules = []
+
+
+class ModuleNode(object):
+    """A title, its paragraphs and its L{ClassNode}s."""
+
+    __slots__ = ('title', 'paragraphs', 'classes', 'location')
+
+    def __init__(self, title):
+        self.title = title
+        self.paragraphs = ()
+        self.location = None
+        self.classes = []
+
+
+class ClassNode(object):
+    """A section, its paragraphs and its L{TestNode}s."""
+
+    __slots__ = ('title', 'paragraphs', 'tests', 'location')
+
+    def __init__(self, title):
+        self.title = title
+        self.paragraphs = ()
+        self.location = None
+        self.tests = []
+
+
+class TestNode(object):
+    """A subsection and its paragraphs."""
+
+    __slots__ = ('title', 'paragraphs', 'location')
+
+    def __init__(self, title):
+        self.title = title
+        self.paragraphs = ()
+        self.location = None
+
+
+class TreeBuilder(object):
+    """A formatter that builds a L{Document}.
+
+    @ivar document: The L{Document} built so far.
+    """
+
+    def __init__(self, locations=False):
+        """
+        @param locations: If true, keep the name, file and line of each node
+            as well, by providing an C{entry} method for the
+            L{testdoc.documenter.Documenter} to call.
+        """
+        self.document = Document()
+        self._last = None
+        if locations:
+            self.entry = self._entry
+
+    def title(self, name):
+        self._last = ModuleNode(name)
+        self.document.modules.append(self._last)
+
+    def section(self, name):
+        self._last = ClassNode(name)
+        self.document.modules[-1].classes.append(self._last)
+
+    def subsection(self, name):
+        self._last = TestNode(name)
+        self.document.modules[-1].classes[-1].tests.append(self._last)
+
+    def paragraph(self, text):
+        self._last.paragraphs += (text,)
+
+    def _entry(self, kind, name, title, docs, filename, lineno):
+        getattr(self, _HEADINGS[kind])(title)
+        if docs is not None:
+            self.paragraph(docs)
+        self._last.location = (name, filename, lineno)
+
+    def clear(self):
+        """Start a new L{Document}, returning the one built so far."""
+        document = self.document
+        self.document = Document()
+        self._last = None
+        return document
+
+
+_HEADINGS = {
+    'module': 'title',
+    'class': 'section',
+    'test': 'subsection',
+    }
+
+
+def _paragraphs(formatter, node):
+    for text in node.paragraphs:
+        formatter.paragraph(text)
+
+
+def _entries(document, entry):
+    def send(kind, node):
+        name, filename, lineno = node.location or (node.title, None, None)
+        docs = None
+        if node.paragraphs:
+            docs = '\n\n'.join(node.paragraphs)
+        entry(kind, name, node.title, docs, filename, lineno)
+    for module in document.modules:
+        send('module', module)
+        for klass in module.classes:
+            send('class', klass)
+            for test in klass.tests:
+                send('test', test)
+
+
+def render(document, formatter):
+    """Send the contents of C{document} to C{formatter}."""
+    entry = getattr(formatter, 'entry', None)
+    if entry is not None:
+        return _entries(document, entry)
+    for module in document.modules:
+        formatter.title(module.title)
+        _paragraphs(formatter, module)
+        for klass in module.classes:
+            formatter.section(klass.title)
+            _paragraphs(formatter, klass)
+            for test in klass.tests:
+                formatter.subsection(test.title)
+                _paragraphs(formatter, test)
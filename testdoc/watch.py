@@ -0,0 +1,213 @@
+# Copyright (c) 2007-2010 testdoc authors. See LICENSE for details.
+
+"""Keep documentation up to date as test modules change.
+
+A L{Watcher} finds the tests in some modules once and keeps what it found.
+After that, it polls the modules' source files and finds the tests again only
+in the modules whose files have changed, then writes the documentation out
+again.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import traceback
+
+from testdoc import cache, documenter, model, reflect, source
+
+
+def write_atomically(path, write):
+    """Call C{write} with a stream, then put what it wrote at C{path}.
+
+    C{path} is replaced in one step, so readers never see it half-written.
+    It keeps the permissions of the file it replaces, and a new file gets
+    those C{open} would give it, rather than the private ones of a temporary
+    file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    try:
+        stream = os.fdopen(fd, 'w')
+        try:
+            write(stream)
+        finally:
+            stream.close()
+        os.chmod(temp, _mode(path))
+        os.rename(temp, path)
+    except:
+        os.unlink(temp)
+        raise
+
+
+def _mode(path):
+    """Return the permissions for a file written to C{path}."""
+    try:
+        return os.stat(path).st_mode & 07777
+    except OSError:
+        pass
+    # The umask can only be read by setting it.
+    umask = os.umask(022)
+    os.umask(umask)
+    return 0666 & ~umask
+
+
+def render(format, modules, stream):
+    """Document C{modules} on C{stream} with a formatter of type C{format}."""
+    doc = documenter.Documenter(format(stream))
+    for module in modules:
+        model.emit(doc, module)
+
+
+class FileOutput(object):
+    """Write the documentation of all of the modules to one file."""
+
+    def __init__(self, format, filename):
+        self.format = format
+        self.filename = filename
+
+    def __call__(self, modules, changed):
+        write_atomically(
+            self.filename,
+            lambda stream: render(self.format, modules, stream))
+
+
+class DirectoryOutput(object):
+    """Write the documentation of each module to its own file in a
+    directory, only writing the files of modules that have changed.
+    """
+
+    def __init__(self, format, directory, extension):
+        self.format = format
+        self.directory = directory
+        self.extension = extension
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def path(self, module):
+        return os.path.join(
+            self.directory, module.__name__ + self.extension)
+
+    def __call__(self, modules, changed):
+        for module in changed:
+            write_atomically(
+                self.path(module),
+                lambda stream: render(self.format, [module], stream))
+
+
+class Watcher(object):
+    """Find the tests in some modules, and find them again when the modules
+    change.
+
+    @ivar modules: A dict mapping arguments to the L{testdoc.model.Module}
+        last found for them.
+    @ivar failed: A dict mapping the arguments whose tests couldn't be found
+        the last time they were looked at to the error. They aren't looked
+        at again until they change.
+    """
+
+    def __init__(self, find_tests, arguments, output, interval=1.0,
+                 errors=sys.stderr, resolver=None):
+        """
+        @param find_tests: A callable taking a finder and one of
+            C{arguments}.
+        @param arguments: Filenames or names of the modules to watch.
+        @param output: A callable taking a list of all of the modules found,
+            in order, and a list of those that have changed. L{FileOutput}
+            and L{DirectoryOutput} are examples.
+        @param interval: The number of seconds between polls.
+        @param errors: Where to report modules whose tests can't be found.
+        @param resolver: The L{reflect.Resolver} C{find_tests} imports
+            modules with, if any. It is cleared before each refresh, so that
+            modules that didn't exist before can be found.
+        """
+        self.find_tests = find_tests
+        self.arguments = list(arguments)
+        self.output = output
+        self.interval = interval
+        self.errors = errors
+        self.resolver = resolver
+        self.modules = {}
+        self.failed = {}
+        self._mtimes = {}
+
+    def _mtime(self, argument):
+        filename = cache.source_filename(argument)
+        if filename is None:
+            return None
+        try:
+            return os.path.getmtime(filename)
+        except OSError:
+            return None
+
+    def _forget(self, argument):
+        """Forget everything about C{argument}, so that the next time its
+        tests are found they are read afresh from its source.
+        """
+        filename = cache.source_filename(argument)
+        if filename is None:
+            return
+        source.forget(filename)
+        for name in [argument, reflect.filenameToModuleName(filename)]:
+            sys.modules.pop(name, None)
+
+    def refresh(self, arguments=None):
+        """Find the tests again in the modules that have changed.
+
+        @param arguments: The modules to look at. Defaults to all of them.
+        @return: A list of the modules that have changed.
+        """
+        if arguments is None:
+            arguments = self.arguments
+        if self.resolver is not None:
+            self.resolver.clear()
+        changed = []
+        for argument in arguments:
+            mtime = self._mtime(argument)
+            if (argument in self._mtimes
+                and self._mtimes[argument] == mtime):
+                continue
+            if argument in self._mtimes:
+                self._forget(argument)
+            self._mtimes[argument] = mtime
+            try:
+                module = model.record(self.find_tests, argument)
+            except KeyboardInterrupt:
+                raise
+            except Exception:
+                # Keep what we had, and try again when it changes.
+                error = traceback.format_exc()
+                self.failed[argument] = error
+                self.errors.write(
+                    'testdoc: could not document %s:\n%s' % (argument, error))
+                continue
+            self.failed.pop(argument, None)
+            self.modules[argument] = module
+            changed.append(module)
+        return changed
+
+    def update(self):
+        """Find the tests in the modules that have changed and write them out.
+
+        @return: A list of the modules that have changed.
+        """
+        changed = self.refresh()
+        if changed:
+            modules = [self.modules[argument] for argument in self.arguments
+                       if argument in self.modules]
+            self.output(modules, changed)
+        return changed
+
+    def run(self, iterations=None, sleep=time.sleep):
+        """Update the documentation every C{interval} seconds.
+
+        @param iterations: How many times to update it. If C{None}, keep
+            going forever.
+        """
+        while iterations is None or iterations > 0:
+            self.update()
+            if iterations is not None:
+                iterations -= 1
+                if not iterations:
+                    break
+            sleep(self.interval)